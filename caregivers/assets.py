@@ -0,0 +1,117 @@
+import gzip
+import mimetypes
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.middleware.gzip import re_accepts_gzip
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.utils.regex_helper import _lazy_re_compile
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+from .middleware import brotli, re_accepts_br
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.json', '.map', '.svg', '.txt', '.html', '.xml')
+
+# Hashed names produced by ManifestStaticFilesStorage, e.g. "swagger-ui.1d2e3f4a5b6c.js".
+re_hashed_name = _lazy_re_compile(r'\.[0-9a-f]{12}\.[^/]+$')
+
+ENCODINGS = (
+    ('br', '.br', re_accepts_br),
+    ('gzip', '.gz', re_accepts_gzip),
+)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Hashed static files with ``.gz`` (and ``.br`` when brotli is installed)
+    siblings written next to them during collectstatic.
+    """
+
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Not collected yet: link the unhashed name, which serve() finds in
+            # the app static directories, rather than fail the whole page.
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+        if not dry_run:
+            for hashed_name in sorted(hashed_names):
+                if hashed_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                    self.compress(hashed_name)
+
+    def compress(self, name):
+        path = Path(self.path(name))
+        content = path.read_bytes()
+        variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(content):
+                path.with_name(path.name + suffix).write_bytes(compressed)
+
+
+@require_safe
+def serve(request, path):
+    """
+    Serve a collected static file, picking a precompressed variant when the
+    client accepts it. Files not collected yet are looked up with the
+    staticfiles finders. FileResponse lets the WSGI server stream the file with
+    its ``wsgi.file_wrapper`` (``sendfile`` under gunicorn) instead of reading
+    it through Python.
+    """
+    try:
+        fullpath = Path(safe_join(settings.STATIC_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404
+    if not fullpath.is_file():
+        found = finders.find(path)
+        if not found:
+            raise Http404
+        fullpath = Path(found)
+
+    content_type, _ = mimetypes.guess_type(fullpath.name)
+    ae = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    encoding = None
+    for name, suffix, accepts in ENCODINGS:
+        variant = fullpath.with_name(fullpath.name + suffix)
+        if accepts.search(ae) and variant.is_file():
+            fullpath, encoding = variant, name
+            break
+
+    statobj = fullpath.stat()
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), statobj.st_mtime):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(
+            fullpath.open('rb'),
+            content_type=content_type or 'application/octet-stream',
+        )
+        # FileResponse derives an inline Content-Disposition from the file name;
+        # static assets do not need one.
+        del response['Content-Disposition']
+        response.headers['Last-Modified'] = http_date(statobj.st_mtime)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if re_hashed_name.search(path):
+        patch_cache_control(response, public=True, max_age=365 * 24 * 60 * 60, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.STATIC_MAX_AGE)
+    return response
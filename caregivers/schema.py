@@ -0,0 +1,189 @@
+import gzip
+import hashlib
+import json
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+from django.views.decorators.http import condition, require_safe
+import drf_yasg
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.generators import OpenAPISchemaGenerator
+from drf_yasg.renderers import ReDocRenderer, SwaggerUIRenderer
+
+import database.schemas  # noqa: F401  attaches the swagger_auto_schema overrides
+
+api_info = openapi.Info(
+    title="Caregivers API",
+    default_version='v1',
+    description="API documentation for Caregivers database CRUD operations",
+    terms_of_service="https://www.google.com/policies/terms/",
+    contact=openapi.Contact(email="contact@caregivers.local"),
+    license=openapi.License(name="BSD License"),
+)
+
+SCHEMA_FORMATS = {
+    '.json': (OpenAPICodecJson, 'application/json'),
+    '.yaml': (OpenAPICodecYaml, 'application/yaml'),
+}
+
+MANIFEST_NAME = 'manifest.json'
+
+re_accepts_gzip = _lazy_re_compile(r'\bgzip\b')
+
+
+class SchemaArtifact:
+    def __init__(self, content, content_type):
+        self.content = content
+        self.content_type = content_type
+        self.gzipped = gzip.compress(content, mtime=0)
+        self.etag = hashlib.sha256(content).hexdigest()[:32]
+
+
+def api_url():
+    """Scheme, host and port advertised in the schema's ``schemes`` and ``host``."""
+    return getattr(settings, 'SWAGGER_SETTINGS', {}).get('DEFAULT_API_URL')
+
+
+def urlconf_fingerprint(resolver=None):
+    """Hash the routes, views and swagger_auto_schema overrides of the URLconf.
+
+    The schema only has to be regenerated when this value changes.
+    """
+    # Generating a schema sets info.version on api_info; leave it out so the
+    # value is the same before and after the first build.
+    info = {key: value for key, value in api_info.items() if key != 'version'}
+    digest = hashlib.sha256(repr((drf_yasg.__version__, info, api_url())).encode())
+
+    def walk(patterns, prefix):
+        for pattern in patterns:
+            route = prefix + str(pattern.pattern)
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns, route)
+            elif isinstance(pattern, URLPattern):
+                overrides = getattr(pattern.callback, '_swagger_auto_schema', None)
+                digest.update(f"{route} {pattern.lookup_str} {overrides!r}\n".encode())
+
+    walk((resolver or get_resolver()).url_patterns, '')
+    return digest.hexdigest()
+
+
+def generate_schema():
+    # There is no request to infer the host from, so it comes from settings.
+    generator = OpenAPISchemaGenerator(api_info, url=api_url())
+    return generator.get_schema(request=None, public=True)
+
+
+def build_artifacts():
+    schema = generate_schema()
+    return {
+        fmt: SchemaArtifact(codec([]).encode(schema), content_type)
+        for fmt, (codec, content_type) in SCHEMA_FORMATS.items()
+    }
+
+
+def write_artifacts(directory, artifacts=None, fingerprint=None):
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    fingerprint = fingerprint or urlconf_fingerprint()
+    artifacts = artifacts or build_artifacts()
+    files = {}
+    for fmt, artifact in artifacts.items():
+        name = f'swagger{fmt}'
+        (directory / name).write_bytes(artifact.content)
+        (directory / f'{name}.gz').write_bytes(artifact.gzipped)
+        files[fmt] = name
+    manifest = {
+        'fingerprint': fingerprint,
+        'files': files,
+    }
+    (directory / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def load_artifacts(directory, fingerprint):
+    """Read a prebuilt schema, or return None if it is missing or stale."""
+    directory = Path(directory)
+    try:
+        manifest = json.loads((directory / MANIFEST_NAME).read_text())
+        if manifest['fingerprint'] != fingerprint:
+            return None
+        return {
+            fmt: SchemaArtifact((directory / manifest['files'][fmt]).read_bytes(), content_type)
+            for fmt, (_, content_type) in SCHEMA_FORMATS.items()
+        }
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+_lock = threading.Lock()
+_state = {'resolver': None, 'fingerprint': None, 'artifacts': None}
+
+
+def get_artifact(fmt):
+    """Return the schema artifact for ``fmt``, building it at most once per URLconf."""
+    resolver = get_resolver()
+    if _state['resolver'] is not resolver:
+        with _lock:
+            if _state['resolver'] is not resolver:
+                fingerprint = urlconf_fingerprint(resolver)
+                if fingerprint != _state['fingerprint']:
+                    directory = getattr(settings, 'OPENAPI_SCHEMA_DIR', None)
+                    artifacts = load_artifacts(directory, fingerprint) if directory else None
+                    _state['artifacts'] = artifacts or build_artifacts()
+                    _state['fingerprint'] = fingerprint
+                _state['resolver'] = resolver
+    return _state['artifacts'][fmt]
+
+
+def _accepts_gzip(request):
+    return bool(re_accepts_gzip.search(request.headers.get('Accept-Encoding', '')))
+
+
+def _schema_etag(request, format):
+    artifact = get_artifact(format)
+    return f'{artifact.etag}-gzip' if _accepts_gzip(request) else artifact.etag
+
+
+@require_safe
+@condition(etag_func=_schema_etag)
+def schema_file(request, format):
+    artifact = get_artifact(format)
+    if _accepts_gzip(request):
+        response = HttpResponse(artifact.gzipped, content_type=artifact.content_type)
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(artifact.content, content_type=artifact.content_type)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+# The UI templates only need the title and version; the pages fetch the schema
+# itself from SPEC_URL, so no introspection happens when they are rendered.
+_ui_stub = SimpleNamespace(info=SimpleNamespace(title=api_info.title, version=api_info._default_version))
+
+
+def ui_page(renderer_class):
+    @require_safe
+    def view(request):
+        if request.GET.get('format') == 'openapi':
+            return schema_file(request, '.json')
+        renderer = renderer_class()
+        context = {'request': request}
+        renderer.set_context(context, _ui_stub)
+        return HttpResponse(render_to_string(renderer.template, context, request), content_type='text/html; charset=utf-8')
+
+    return view
+
+
+swagger_ui = ui_page(SwaggerUIRenderer)
+
+redoc_ui = ui_page(ReDocRenderer)
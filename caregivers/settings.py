@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -8,20 +9,37 @@ DEBUG = False
 
 ALLOWED_HOSTS = ['*']
 
+# Startup profile: 'full' also serves the admin site and the API docs, 'api'
+# leaves out the admin app, its URLs and drf_yasg. The django.contrib.admin
+# modules are still imported either way (rest_framework.views pulls them in via
+# rest_framework.schemas and django.contrib.admindocs), so the saving is mostly
+# drf_yasg and the schema definitions, a few dozen modules at most.
+SERVER_PROFILE = os.environ.get('CAREGIVERS_PROFILE', 'full')
+
+ADMIN_ENABLED = SERVER_PROFILE == 'full'
+
+API_DOCS_ENABLED = SERVER_PROFILE == 'full'
+
 INSTALLED_APPS = [
-    'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
-    'drf_yasg',
     'database',
 ]
 
+if ADMIN_ENABLED:
+    INSTALLED_APPS.insert(0, 'django.contrib.admin')
+
+if API_DOCS_ENABLED:
+    INSTALLED_APPS.append('drf_yasg')
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'caregivers.middleware.CompressionMiddleware',
+    'database.ratelimit.RateLimitMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -86,4 +104,107 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Run `manage.py collectstatic` on deploy to get hashed, precompressed files;
+# until then static URLs stay unhashed and are served from the app directories.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'caregivers.assets.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Cache lifetime for static files without a content hash in their name; hashed
+# files are served as immutable.
+STATIC_MAX_AGE = 60 * 60
+
+# Responses smaller than this many bytes are not worth compressing.
+COMPRESSION_MIN_SIZE = 1024
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Host-local state shared by the workers: rate limit buckets and auth tokens.
+# Keep it in a directory only the app's user can write; the token cache is
+# pickled, so anyone who can write there can run code in the app.
+STATE_DIR = Path(os.environ.get('CAREGIVERS_STATE_DIR', BASE_DIR / 'var'))
+
+# Prebuilt OpenAPI schema written by `manage.py generate_schema`; the schema is
+# generated in-process instead when this is missing or older than the URLconf.
+OPENAPI_SCHEMA_DIR = BASE_DIR / 'openapi'
+
+# Point the Swagger UI and ReDoc pages at the cached schema document. The schema
+# is built without a request, so the host it advertises is DEFAULT_API_URL.
+SWAGGER_SETTINGS = {
+    'DEFAULT_API_URL': os.environ.get('CAREGIVERS_API_URL', 'http://localhost:8000'),
+    'SPEC_URL': ('schema-json', {'format': '.json'}),
+}
+
+REDOC_SETTINGS = {
+    'SPEC_URL': ('schema-json', {'format': '.json'}),
+}
+
+# Where rate limit buckets and concurrency slots live. FileBackend shares them
+# between the workers of one host; LocalBackend keeps them per process.
+# FileBackend serializes every check behind one host-wide file lock and rewrites
+# the whole file each time: a limited request costs one transaction, plus one
+# more to release a concurrency slot, around a millisecond in total on local
+# disk and serialized across all workers. Busy hosts should use a shared
+# in-memory store instead.
+RATE_LIMIT_BACKEND = {
+    'BACKEND': 'database.ratelimit.FileBackend',
+    'OPTIONS': {
+        'path': STATE_DIR / 'ratelimit.json',
+    },
+}
+
+# Proxies (addresses or networks) in front of the app, such as the API gateway.
+# Requests from them are rate limited by the client address in X-Forwarded-For.
+RATE_LIMIT_TRUSTED_PROXIES = [
+    proxy for proxy in os.environ.get('CAREGIVERS_TRUSTED_PROXIES', '').split(',') if proxy
+]
+
+# Database-backed background task queue, processed by `manage.py run_tasks`.
+TASK_QUEUE = {
+    'BATCH_SIZE': 50,
+    'POLL_INTERVAL': 1.0,
+    'RETRY_DELAY': 30,
+    'STALLED_AFTER': 600,
+    # Done tasks are deleted after this many seconds.
+    'RETENTION': 7 * 24 * 60 * 60,
+}
+
+# Mail sent by background tasks goes to stdout unless a real backend (and its
+# EMAIL_HOST settings) is configured for the deployment.
+EMAIL_BACKEND = os.environ.get('CAREGIVERS_EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Must be shared by all workers: a token is issued by one and used on others.
+    'auth_tokens': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': STATE_DIR / 'auth-tokens',
+    },
+}
+
+# At most CONCURRENCY password hashes run at once, counted in RATE_LIMIT_BACKEND
+# (so host-wide with FileBackend); further requests get a 503 straight away. A
+# slot held for TIMEOUT seconds is assumed leaked and freed.
+PASSWORD_HASHING = {
+    'CONCURRENCY': 4,
+    'TIMEOUT': 10,
+}
+
+# Bearer tokens from /api/auth/token/ stand in for the password for this long.
+AUTH_TOKEN_CACHE = 'auth_tokens'
+AUTH_TOKEN_TTL = 5 * 60
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'database.credentials.BearerTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+}
@@ -0,0 +1,251 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils.http import http_date
+from drf_yasg.generators import OpenAPISchemaGenerator
+
+from . import schema
+from .assets import CompressedManifestStaticFilesStorage, serve
+from .middleware import CompressionMiddleware, brotli
+
+BODY = b'{"caregivers": []}' * 200
+
+
+class SchemaTestCase(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings_override = override_settings(OPENAPI_SCHEMA_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.reset_state()
+        self.addCleanup(self.reset_state)
+
+    def reset_state(self):
+        schema._state.update(resolver=None, fingerprint=None, artifacts=None)
+
+
+class SchemaFileTests(SchemaTestCase):
+    def test_plain_json(self):
+        response = self.client.get('/swagger.json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('no-cache', response['Cache-Control'])
+        spec = json.loads(response.content)
+        self.assertEqual((spec['host'], spec['schemes']), ('localhost:8000', ['http']))
+
+    def test_gzip_variant(self):
+        plain = self.client.get('/swagger.json')
+        response = self.client.get('/swagger.json', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertNotEqual(response['ETag'], plain['ETag'])
+
+    def test_yaml(self):
+        response = self.client.get('/swagger.yaml')
+        self.assertEqual(response['Content-Type'], 'application/yaml')
+        self.assertTrue(response.content.startswith(b'swagger:'))
+
+    def test_not_modified(self):
+        etag = self.client.get('/swagger.json')['ETag']
+        response = self.client.get('/swagger.json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_stale_etag_gets_full_response(self):
+        response = self.client.get('/swagger.json', HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+
+class ArtifactTests(SchemaTestCase):
+    def test_load_matching_fingerprint(self):
+        manifest = schema.write_artifacts(self.directory)
+        artifacts = schema.load_artifacts(self.directory, manifest['fingerprint'])
+        self.assertEqual(set(artifacts), set(schema.SCHEMA_FORMATS))
+
+    def test_load_stale_fingerprint(self):
+        schema.write_artifacts(self.directory, fingerprint='old')
+        self.assertIsNone(schema.load_artifacts(self.directory, 'new'))
+
+    def test_load_missing(self):
+        self.assertIsNone(schema.load_artifacts(self.directory, 'any'))
+
+    def test_prebuilt_artifacts_skip_generation(self):
+        schema.write_artifacts(self.directory)
+        with mock.patch.object(schema, 'build_artifacts') as build:
+            schema.get_artifact('.json')
+        build.assert_not_called()
+
+    def test_built_once_per_resolver(self):
+        with mock.patch.object(schema, 'build_artifacts', wraps=schema.build_artifacts) as build:
+            schema.get_artifact('.json')
+            schema.get_artifact('.yaml')
+            self.assertEqual(build.call_count, 1)
+
+            # A reloaded but identical URLconf keeps the artifacts.
+            with mock.patch.object(schema, 'get_resolver', return_value=mock.Mock(url_patterns=schema.get_resolver().url_patterns)):
+                schema.get_artifact('.json')
+            self.assertEqual(build.call_count, 1)
+
+            with mock.patch.object(schema, 'get_resolver', return_value=mock.Mock(url_patterns=[])):
+                schema.get_artifact('.json')
+            self.assertEqual(build.call_count, 2)
+
+
+class SchemaUITests(SchemaTestCase):
+    def test_pages_do_not_generate_schema(self):
+        with mock.patch.object(OpenAPISchemaGenerator, 'get_schema', side_effect=AssertionError) as get_schema:
+            for url in ('/swagger/', '/redoc/'):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Caregivers API')
+        get_schema.assert_not_called()
+
+    def test_openapi_format_serves_cached_schema(self):
+        schema.write_artifacts(self.directory)
+        with mock.patch.object(OpenAPISchemaGenerator, 'get_schema') as get_schema:
+            response = self.client.get('/swagger/', {'format': 'openapi'})
+        get_schema.assert_not_called()
+        self.assertEqual(response.content, self.client.get('/swagger.json').content)
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressionMiddlewareTests(SimpleTestCase):
+    def process(self, response, accept_encoding='gzip, deflate, br'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def json_response(self, body=BODY):
+        return HttpResponse(body, content_type='application/json')
+
+    @unittest.skipIf(brotli is None, "brotli is not installed")
+    def test_prefers_brotli(self):
+        response = self.process(self.json_response())
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), BODY)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_gzip_when_brotli_not_accepted(self):
+        response = self.process(self.json_response(), 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), BODY)
+
+    def test_identity_when_nothing_accepted(self):
+        response = self.process(self.json_response(), '')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_small_responses_left_alone(self):
+        response = self.process(self.json_response(b'{}'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, b'{}')
+
+    def test_incompressible_types_left_alone(self):
+        response = self.process(HttpResponse(BODY, content_type='image/png'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_file_responses_left_alone(self):
+        with tempfile.NamedTemporaryFile(suffix='.js') as f:
+            f.write(BODY)
+            f.flush()
+            response = self.process(FileResponse(open(f.name, 'rb'), content_type='application/javascript'))
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertIsNotNone(response.file_to_stream)
+            response.close()
+
+    @unittest.skipIf(brotli is None, "brotli is not installed")
+    def test_streaming_brotli(self):
+        chunks = [BODY[:1000], BODY[1000:]]
+        response = self.process(StreamingHttpResponse(iter(chunks), content_type='application/json'))
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(brotli.decompress(b''.join(response.streaming_content)), BODY)
+
+
+class StaticServeTests(SimpleTestCase):
+    hashed = 'app.0123456789ab.js'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+        for name in (self.hashed, 'app.js'):
+            (self.root / name).write_bytes(BODY)
+        (self.root / (self.hashed + '.gz')).write_bytes(gzip.compress(BODY))
+        (self.root / (self.hashed + '.br')).write_bytes(b'brotli bytes')
+        settings_override = override_settings(STATIC_ROOT=str(self.root), STATIC_MAX_AGE=3600)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def get(self, path, **headers):
+        response = serve(RequestFactory().get('/static/' + path, **headers), path)
+        self.addCleanup(response.close)
+        return response
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_picks_brotli_variant(self):
+        response = self.get(self.hashed, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(response['Content-Type'], 'text/javascript')
+        self.assertEqual(self.body(response), b'brotli bytes')
+
+    def test_picks_gzip_variant(self):
+        response = self.get(self.hashed, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(self.body(response)), BODY)
+
+    def test_identity_without_accept_encoding(self):
+        response = self.get(self.hashed)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(self.body(response), BODY)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_no_variant_serves_original(self):
+        response = self.get('app.js', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_no_content_disposition(self):
+        self.assertFalse(self.get('app.js').has_header('Content-Disposition'))
+
+    def test_immutable_only_for_hashed_names(self):
+        self.assertIn('immutable', self.get(self.hashed)['Cache-Control'])
+        self.assertIn('max-age=31536000', self.get(self.hashed)['Cache-Control'])
+        cache_control = self.get('app.js')['Cache-Control']
+        self.assertNotIn('immutable', cache_control)
+        self.assertIn('max-age=3600', cache_control)
+
+    def test_not_modified(self):
+        mtime = os.stat(self.root / 'app.js').st_mtime
+        response = self.get('app.js', HTTP_IF_MODIFIED_SINCE=http_date(mtime))
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_and_outside_paths(self):
+        for path in ('missing.js', '../etc/passwd'):
+            with self.assertRaises(Http404):
+                serve(RequestFactory().get('/static/' + path), path)
+
+
+class CompressedStorageTests(SimpleTestCase):
+    def test_compress_writes_smaller_variants_only(self):
+        with tempfile.TemporaryDirectory() as root:
+            storage = CompressedManifestStaticFilesStorage(location=root)
+            Path(root, 'big.js').write_bytes(BODY)
+            Path(root, 'tiny.js').write_bytes(b'x')
+            storage.compress('big.js')
+            storage.compress('tiny.js')
+            self.assertTrue(Path(root, 'big.js.gz').is_file())
+            self.assertFalse(Path(root, 'tiny.js.gz').exists())
+            if brotli is not None:
+                self.assertEqual(brotli.decompress(Path(root, 'big.js.br').read_bytes()), BODY)
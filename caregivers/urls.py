@@ -1,36 +1,45 @@
-from django.contrib import admin
 from django.urls import path, include, re_path
-from django.views.static import serve
 from django.conf import settings
 from django.conf.urls.static import static
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
-schema_view = get_schema_view(
-   openapi.Info(
-      title="Caregivers API",
-      default_version='v1',
-      description="API documentation for Caregivers database CRUD operations",
-      terms_of_service="https://www.google.com/policies/terms/",
-      contact=openapi.Contact(email="contact@caregivers.local"),
-      license=openapi.License(name="BSD License"),
-   ),
-   public=True,
-   permission_classes=(permissions.AllowAny,),
-)
+from django.utils.module_loading import import_string
+
+from .assets import serve
+
+
+def lazy_view(dotted_path):
+    """Import a view on its first request instead of when the URLconf loads."""
+    view = None
+
+    def wrapper(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(dotted_path)
+        return view(request, *args, **kwargs)
+
+    return wrapper
+
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('api/', include('database.urls')),
-    re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 ]
 
+if settings.ADMIN_ENABLED:
+    from django.contrib import admin
+
+    urlpatterns += [
+        path('admin/', admin.site.urls),
+    ]
+
+if settings.API_DOCS_ENABLED:
+    urlpatterns += [
+        re_path(r'^swagger(?P<format>\.json|\.yaml)$', lazy_view('caregivers.schema.schema_file'), name='schema-json'),
+        path('swagger/', lazy_view('caregivers.schema.swagger_ui'), name='schema-swagger-ui'),
+        path('redoc/', lazy_view('caregivers.schema.redoc_ui'), name='schema-redoc'),
+    ]
+
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 else:
     urlpatterns += [
-        re_path(r'^static/(?P<path>.*)$', serve, {'document_root': settings.STATIC_ROOT}),
+        re_path(r'^static/(?P<path>.*)$', serve),
     ]
@@ -0,0 +1,61 @@
+from django.core.checks import Error, Tags, register
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+
+LOCALITY_MIGRATION = ('database', '0001_initial')
+
+
+def locality_tables():
+    from .models import Address, User
+
+    return [User._meta.db_table, Address._meta.db_table]
+
+
+def missing_locality_columns(connection):
+    """Tables of User and Address that exist but have no locality_id column."""
+    tables = connection.introspection.table_names()
+    missing = []
+    for table in locality_tables():
+        if table not in tables:
+            continue
+        with connection.cursor() as cursor:
+            columns = [column.name for column in connection.introspection.get_table_description(cursor, table)]
+        if 'locality_id' not in columns:
+            missing.append(table)
+    return missing
+
+
+def add_locality_columns(connection):
+    """Add the locality foreign key columns migration 0001 skipped; return the tables changed."""
+    missing = missing_locality_columns(connection)
+    with connection.schema_editor() as schema_editor:
+        qn = schema_editor.quote_name
+        for table in missing:
+            schema_editor.execute(
+                f'ALTER TABLE {qn(table)} ADD COLUMN {qn("locality_id")} integer NULL '
+                f'REFERENCES {qn("locality")} ({qn("locality_id")}) ON DELETE SET NULL'
+            )
+            schema_editor.execute(f'CREATE INDEX {qn(table + "_locality_id_idx")} ON {qn(table)} ({qn("locality_id")})')
+    return missing
+
+
+@register(Tags.database)
+def check_locality_columns(app_configs, databases=None, **kwargs):
+    """
+    "user" and "address" are created outside Django; migration 0001 adds their
+    locality_id column only if they already exist when it runs. Report tables
+    loaded afterwards, which every User and Address query would fail on.
+    """
+    errors = []
+    for alias in databases or ():
+        connection = connections[alias]
+        if LOCALITY_MIGRATION not in MigrationRecorder(connection).applied_migrations():
+            continue
+        for table in missing_locality_columns(connection):
+            errors.append(Error(
+                f'Table "{table}" has no locality_id column.',
+                hint="The table was created after migration database.0001_initial ran. "
+                     "Run `manage.py sync_localities --add-columns` to add it.",
+                id='database.E001',
+            ))
+    return errors
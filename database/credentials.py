@@ -0,0 +1,126 @@
+import hashlib
+import secrets
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from django.core.cache import caches
+from django.utils.crypto import constant_time_compare
+from rest_framework import authentication, exceptions
+
+from .models import User
+
+
+class HashingUnavailable(Exception):
+    """Too many password hashes are already running on this host."""
+
+
+HASHING_SLOT = 'password-hashing'
+
+
+@contextmanager
+def hashing_slot():
+    """Hold one of the host-wide KDF slots, or raise HashingUnavailable at once.
+
+    Slots are kept by the rate limit backend, so with FileBackend at most
+    CONCURRENCY hashes run at once across all workers on the host. A slot not
+    released within TIMEOUT seconds (a worker killed mid-hash) expires.
+    """
+    from .ratelimit import get_backend
+
+    config = settings.PASSWORD_HASHING
+    backend = get_backend()
+    token = backend.acquire(HASHING_SLOT, config['CONCURRENCY'], config['TIMEOUT'])
+    if token is None:
+        raise HashingUnavailable
+    try:
+        yield
+    finally:
+        backend.release(HASHING_SLOT, token)
+
+
+def hash_password(raw_password):
+    with hashing_slot():
+        return make_password(raw_password)
+
+
+def is_hashed(value):
+    try:
+        identify_hasher(value)
+    except ValueError:
+        return False
+    return True
+
+
+def verify_password(user, raw_password):
+    """Check ``raw_password`` against ``user``, upgrading the stored hash if needed.
+
+    Stored values that are not hashes are legacy plain text passwords; they
+    are compared directly and replaced by a hash on the first good login.
+    Hashes made with an outdated hasher or iteration count are rehashed.
+    """
+    upgraded = []
+    if is_hashed(user.password):
+        with hashing_slot():
+            valid = check_password(raw_password, user.password, lambda raw: upgraded.append(make_password(raw)))
+    else:
+        valid = bool(user.password) and constant_time_compare(raw_password, user.password)
+        if valid:
+            upgraded.append(hash_password(raw_password))
+    if valid and upgraded:
+        user.password = upgraded[0]
+        User.objects.filter(pk=user.pk).update(password=user.password)
+    return valid
+
+
+def authenticate(email, raw_password):
+    try:
+        user = User.objects.get(email=email)
+    except User.DoesNotExist:
+        # Spend the same KDF time as a real check so unknown emails are not
+        # distinguishable by response time.
+        hash_password(raw_password)
+        return None
+    return user if verify_password(user, raw_password) else None
+
+
+def _token_key(token):
+    return 'auth-token:' + hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue_token(user):
+    """Create a short-lived bearer token, so later requests skip the KDF."""
+    token = secrets.token_urlsafe(32)
+    caches[settings.AUTH_TOKEN_CACHE].set(_token_key(token), user.pk, settings.AUTH_TOKEN_TTL)
+    return token
+
+
+def user_id_for_token(token):
+    return caches[settings.AUTH_TOKEN_CACHE].get(_token_key(token))
+
+
+def user_for_token(token):
+    user_id = user_id_for_token(token)
+    if user_id is None:
+        return None
+    return User.objects.filter(pk=user_id).first()
+
+
+class BearerTokenAuthentication(authentication.BaseAuthentication):
+    """``Authorization: Bearer <token>`` with tokens from the auth token endpoint."""
+
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = authentication.get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        user = user_for_token(auth[1].decode('latin-1'))
+        if user is None:
+            raise exceptions.AuthenticationFailed('Invalid or expired token.')
+        return user, auth[1]
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from caregivers.schema import write_artifacts
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema (JSON and YAML, plain and gzipped) into a static directory."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', '-o',
+            default=settings.OPENAPI_SCHEMA_DIR,
+            help="Directory to write the schema files to (default: OPENAPI_SCHEMA_DIR).",
+        )
+
+    def handle(self, *args, **options):
+        manifest = write_artifacts(options['output'])
+        for name in manifest['files'].values():
+            self.stdout.write(f"Wrote {name} and {name}.gz")
+        self.stdout.write(self.style.SUCCESS(
+            f"Schema written to {options['output']} (URLconf {manifest['fingerprint'][:12]})"
+        ))
@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Mirrors a worker boot: settings, app registry, middleware and the URLconf.
+BOOT_SCRIPT = (
+    "import django; django.setup(); "
+    "from django.core.handlers.wsgi import WSGIHandler; WSGIHandler(); "
+    "from django.urls import get_resolver; get_resolver().url_patterns"
+)
+
+
+def parse_importtime(output):
+    """Return ``(module, self_us, cumulative_us)`` rows from ``-X importtime`` output."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        rows.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Report an import-time breakdown of a cold worker boot."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profile',
+            choices=['full', 'api'],
+            default=os.environ.get('CAREGIVERS_PROFILE', 'full'),
+            help="Startup profile to measure (default: CAREGIVERS_PROFILE or 'full').",
+        )
+        parser.add_argument(
+            '--top', type=int, default=15,
+            help="Number of slowest modules to list.",
+        )
+        parser.add_argument(
+            '--budget', type=float,
+            help="Fail if the total import time exceeds this many milliseconds.",
+        )
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, CAREGIVERS_PROFILE=options['profile'])
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT],
+            env=env, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Worker boot failed:\n{result.stderr}")
+
+        rows = parse_importtime(result.stderr)
+        total = sum(self_us for _, self_us, _ in rows) / 1000
+        by_package = defaultdict(int)
+        for module, self_us, _ in rows:
+            by_package[module.split('.')[0]] += self_us
+
+        self.stdout.write(f"Profile '{options['profile']}': {len(rows)} modules imported in {total:.1f} ms\n")
+        self.stdout.write(f"{'package':<30} {'ms':>9} {'share':>7}")
+        for package, self_us in sorted(by_package.items(), key=lambda item: -item[1]):
+            ms = self_us / 1000
+            self.stdout.write(f"{package:<30} {ms:>9.1f} {ms / total:>7.1%}")
+
+        self.stdout.write(f"\n{'slowest modules (self)':<50} {'ms':>9} {'cumulative':>11}")
+        for module, self_us, cumulative_us in sorted(rows, key=lambda row: -row[1])[:options['top']]:
+            self.stdout.write(f"{module:<50} {self_us / 1000:>9.1f} {cumulative_us / 1000:>11.1f}")
+
+        if options['budget'] is not None:
+            if total > options['budget']:
+                raise CommandError(f"Import time {total:.1f} ms exceeds the budget of {options['budget']:.1f} ms")
+            self.stdout.write(self.style.SUCCESS(f"\nWithin budget ({total:.1f} / {options['budget']:.1f} ms)"))
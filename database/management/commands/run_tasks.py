@@ -0,0 +1,82 @@
+import multiprocessing
+import signal
+import time
+from multiprocessing.connection import wait
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from database.taskqueue import queue_setting, work
+
+
+def run_worker(results, batch_size, poll_interval, burst):
+    # Workers restarted by the supervisor inherit its SIGTERM handler.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    results.put(work(batch_size, poll_interval, burst))
+
+
+def interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+class Command(BaseCommand):
+    help = "Run and supervise background task worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', '-p', type=int, default=2,
+            help="Number of worker processes.",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=queue_setting('BATCH_SIZE'),
+            help="Most tasks of one kind handed to a batch handler at once.",
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=queue_setting('POLL_INTERVAL'),
+            help="Seconds to sleep when the queue is empty.",
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help="Exit once the queue is empty instead of polling forever.",
+        )
+
+    def handle(self, *args, **options):
+        # Forked workers must open their own database connections.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        results = context.SimpleQueue()
+        args = (results, options['batch_size'], options['poll_interval'], options['burst'])
+
+        def start():
+            process = context.Process(target=run_worker, args=args, daemon=True)
+            process.start()
+            return process
+
+        workers = [start() for _ in range(options['processes'])]
+        # Stop the workers on SIGTERM (e.g. from a process manager) like on Ctrl-C.
+        previous_handler = signal.signal(signal.SIGTERM, interrupt)
+        try:
+            while workers:
+                wait([process.sentinel for process in workers])
+                for process in [p for p in workers if not p.is_alive()]:
+                    workers.remove(process)
+                    if options['burst'] and process.exitcode == 0:
+                        continue
+                    # A dead worker only loses the tasks it was running; those
+                    # are requeued once stalled. Replace it and carry on.
+                    self.stderr.write(f"Worker {process.pid} exited with code {process.exitcode}, restarting")
+                    time.sleep(options['poll_interval'])
+                    workers.append(start())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            signal.signal(signal.SIGTERM, previous_handler)
+            for process in workers:
+                process.terminate()
+            for process in workers:
+                process.join()
+
+        processed = 0
+        while not results.empty():
+            processed += results.get()
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} tasks"))
@@ -0,0 +1,79 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from database.checks import add_locality_columns
+from database.models import Address, Locality, LocalityAlias, User, normalize_locality
+
+
+class Command(BaseCommand):
+    help = "Link users and addresses to canonical localities, optionally loading coordinates first."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--gazetteer',
+            help="CSV file with name,latitude,longitude[,aliases] rows; aliases are separated by '|'.",
+        )
+        parser.add_argument(
+            '--add-columns', action='store_true',
+            help="First add locality_id to user and address tables created after the migrations ran.",
+        )
+
+    def handle(self, *args, **options):
+        if options['add_columns']:
+            for table in add_locality_columns(connection):
+                self.stdout.write(f"Added locality_id to {table}")
+        with transaction.atomic():
+            if options['gazetteer']:
+                self.load_gazetteer(options['gazetteer'])
+            resolved = {}
+            users = self.link(User, 'city', resolved)
+            addresses = self.link(Address, 'town', resolved)
+        self.stdout.write(self.style.SUCCESS(
+            f"Linked {users} users and {addresses} addresses to {len(set(resolved.values()) - {None})} localities"
+        ))
+
+    def load_gazetteer(self, path):
+        try:
+            with open(path, newline='', encoding='utf-8') as f:
+                rows = list(csv.reader(f))
+        except OSError as e:
+            raise CommandError(f"Cannot read gazetteer: {e}")
+
+        for number, row in enumerate(rows, 1):
+            if not row or row[0].strip().lower() == 'name':
+                continue
+            try:
+                name, latitude, longitude = row[0], float(row[1]), float(row[2])
+            except (IndexError, ValueError):
+                raise CommandError(f"{path}, row {number}: expected name,latitude,longitude, got {row!r}")
+            if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                raise CommandError(f"{path}, row {number}: coordinates out of range")
+            locality = Locality.objects.lookup(name) or Locality()
+            locality.name = name.strip()
+            locality.latitude = latitude
+            locality.longitude = longitude
+            locality.save()
+            aliases = row[3].split('|') if len(row) > 3 else []
+            for alias in aliases:
+                key = normalize_locality(alias)
+                if key and key != locality.key:
+                    # A variant registered on its own earlier is folded into the
+                    # canonical locality; its users are re-linked below.
+                    Locality.objects.filter(key=key).delete()
+                    LocalityAlias.objects.update_or_create(key=key, defaults={'locality': locality})
+        self.stdout.write(f"Loaded {len(rows)} gazetteer rows from {path}")
+
+    def link(self, model, field, resolved):
+        changed = []
+        for instance in model.objects.only(model._meta.pk.attname, field, 'locality').iterator():
+            key = normalize_locality(getattr(instance, field))
+            if key not in resolved:
+                locality = Locality.objects.resolve(getattr(instance, field))
+                resolved[key] = locality.pk if locality else None
+            if instance.locality_id != resolved[key]:
+                instance.locality_id = resolved[key]
+                changed.append(instance)
+        model.objects.bulk_update(changed, ['locality'], batch_size=500)
+        return len(changed)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from database.taskqueue import queue_stats
+
+
+def seconds(value):
+    return f"{value.total_seconds():.1f}s" if value is not None else '-'
+
+
+class Command(BaseCommand):
+    help = "Show background task queue depth and latency per task."
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'task':<50} {'queued':>7} {'running':>8} {'failed':>7} {'done/1h':>8} "
+            f"{'oldest wait':>12} {'avg latency':>12} {'max latency':>12} {'avg duration':>13}"
+        )
+        for row in queue_stats():
+            self.stdout.write(
+                f"{row['name']:<50} {row['queued']:>7} {row['running']:>8} {row['failed']:>7} "
+                f"{row['done_recently']:>8} {seconds(row['oldest_wait']):>12} {seconds(row['avg_latency']):>12} "
+                f"{seconds(row['max_latency']):>12} {seconds(row['avg_duration']):>13}"
+            )
@@ -0,0 +1,172 @@
+# Generated by Django 5.2.8 on 2026-10-19 09:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+LOCALITY_TABLES = ('user', 'address')
+
+
+def add_locality_columns(apps, schema_editor):
+    # "user" and "address" are not managed by Django; add the locality foreign
+    # keys to them only where those tables exist.
+    connection = schema_editor.connection
+    qn = schema_editor.quote_name
+    tables = connection.introspection.table_names()
+    for table in LOCALITY_TABLES:
+        if table not in tables:
+            continue
+        with connection.cursor() as cursor:
+            columns = [column.name for column in connection.introspection.get_table_description(cursor, table)]
+        if 'locality_id' in columns:
+            continue
+        schema_editor.execute(
+            f'ALTER TABLE {qn(table)} ADD COLUMN {qn("locality_id")} integer NULL '
+            f'REFERENCES {qn("locality")} ({qn("locality_id")}) ON DELETE SET NULL'
+        )
+        schema_editor.execute(f'CREATE INDEX {qn(table + "_locality_id_idx")} ON {qn(table)} ({qn("locality_id")})')
+
+
+def remove_locality_columns(apps, schema_editor):
+    connection = schema_editor.connection
+    qn = schema_editor.quote_name
+    tables = connection.introspection.table_names()
+    for table in LOCALITY_TABLES:
+        if table in tables:
+            schema_editor.execute(f'DROP INDEX IF EXISTS {qn(table + "_locality_id_idx")}')
+            schema_editor.execute(f'ALTER TABLE {qn(table)} DROP COLUMN {qn("locality_id")}')
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Appointment',
+            fields=[
+                ('appointment_id', models.AutoField(primary_key=True, serialize=False)),
+                ('appointment_date', models.DateField()),
+                ('appointment_time', models.TimeField()),
+                ('work_hours', models.DecimalField(decimal_places=2, max_digits=4)),
+                ('status', models.CharField(choices=[('Pending', 'Pending'), ('Confirmed', 'Confirmed'), ('Declined', 'Declined')], default='Pending', max_length=20)),
+            ],
+            options={
+                'db_table': 'appointment',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='User',
+            fields=[
+                ('user_id', models.AutoField(primary_key=True, serialize=False)),
+                ('email', models.CharField(max_length=255, unique=True)),
+                ('given_name', models.CharField(blank=True, max_length=100, null=True)),
+                ('surname', models.CharField(blank=True, max_length=100, null=True)),
+                ('city', models.CharField(blank=True, max_length=100, null=True)),
+                ('phone_number', models.CharField(blank=True, max_length=20, null=True)),
+                ('profile_description', models.TextField(blank=True, null=True)),
+                ('password', models.CharField(max_length=255)),
+            ],
+            options={
+                'db_table': 'user',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('job_id', models.AutoField(primary_key=True, serialize=False)),
+                ('required_caregiving_type', models.CharField(choices=[('babysitter', 'Babysitter'), ('caregiver for elderly', 'Caregiver for Elderly'), ('playmate for children', 'Playmate for Children')], max_length=50)),
+                ('other_requirements', models.TextField(blank=True, null=True)),
+                ('date_posted', models.DateField(auto_now_add=True, null=True)),
+            ],
+            options={
+                'db_table': 'job',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='JobApplication',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_applied', models.DateField(auto_now_add=True, null=True)),
+            ],
+            options={
+                'db_table': 'job_application',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Caregiver',
+            fields=[
+                ('caregiver_user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='database.user')),
+                ('photo', models.TextField(blank=True, null=True)),
+                ('gender', models.CharField(blank=True, max_length=50, null=True)),
+                ('caregiving_type', models.CharField(choices=[('babysitter', 'Babysitter'), ('caregiver for elderly', 'Caregiver for Elderly'), ('playmate for children', 'Playmate for Children')], max_length=50)),
+                ('hourly_rate', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+            ],
+            options={
+                'db_table': 'caregiver',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Member',
+            fields=[
+                ('member_user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='database.user')),
+                ('house_rules', models.TextField(blank=True, null=True)),
+                ('dependent_description', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'member',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Locality',
+            fields=[
+                ('locality_id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('grid_row', models.IntegerField(blank=True, editable=False, null=True)),
+                ('grid_col', models.IntegerField(blank=True, editable=False, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'localities',
+                'db_table': 'locality',
+                'indexes': [models.Index(fields=['grid_row', 'grid_col'], name='locality_grid_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LocalityAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('locality', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='database.locality')),
+            ],
+            options={
+                'verbose_name_plural': 'locality aliases',
+                'db_table': 'locality_alias',
+            },
+        ),
+        migrations.CreateModel(
+            name='Address',
+            fields=[
+                ('member_user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='database.member')),
+                ('house_number', models.CharField(blank=True, max_length=20, null=True)),
+                ('street', models.CharField(blank=True, max_length=255, null=True)),
+                ('town', models.CharField(blank=True, max_length=100, null=True)),
+            ],
+            options={
+                'db_table': 'address',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(add_locality_columns, remove_locality_columns),
+    ]
@@ -1,4 +1,16 @@
+import math
+import unicodedata
+
 from django.db import models
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+from django.utils import timezone
+
+EARTH_RADIUS_KM = 6371.0
+
+# Size in degrees of the grid cells localities are bucketed into for
+# distance-bounded lookups (about 11 km of latitude).
+GRID_SIZE = 0.1
 
 
 class AppointmentStatus(models.TextChoices):
@@ -7,12 +19,138 @@ class AppointmentStatus(models.TextChoices):
     DECLINED = 'Declined', 'Declined'
 
 
+class TaskStatus(models.TextChoices):
+    QUEUED = 'queued', 'Queued'
+    RUNNING = 'running', 'Running'
+    DONE = 'done', 'Done'
+    FAILED = 'failed', 'Failed'
+
+
 class CaregivingType(models.TextChoices):
     BABYSITTER = 'babysitter', 'Babysitter'
     CAREGIVER_ELDERLY = 'caregiver for elderly', 'Caregiver for Elderly'
     PLAYMATE = 'playmate for children', 'Playmate for Children'
 
 
+def normalize_locality(name):
+    """Reduce a town or city name to its lookup key: "  Almaty " and "almaty" match."""
+    if not name:
+        return ''
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(ch for ch in name if not unicodedata.combining(ch)).casefold()
+    return ' '.join(''.join(ch if ch.isalnum() else ' ' for ch in name).split())
+
+
+def grid_cell(latitude, longitude):
+    return math.floor(latitude / GRID_SIZE), math.floor(longitude / GRID_SIZE)
+
+
+class LocalityQuerySet(models.QuerySet):
+    def lookup(self, name):
+        """Return the locality that ``name`` or one of its aliases refers to, if any."""
+        key = normalize_locality(name)
+        if not key:
+            return None
+        return (
+            self.filter(key=key).first()
+            or self.filter(aliases__key=key).first()
+        )
+
+    def resolve(self, name):
+        """Like ``lookup`` but registers unknown names as new localities."""
+        locality = self.lookup(name)
+        if locality is None and normalize_locality(name):
+            locality, _ = self.get_or_create(key=normalize_locality(name), defaults={'name': name.strip()})
+        return locality
+
+    def within(self, latitude, longitude, km):
+        """Localities with coordinates at most ``km`` kilometres from the given point.
+
+        The grid cell range narrows the search through ``locality_grid_idx``;
+        the great-circle distance is then checked in the database. A range
+        crossing the antimeridian is split in two, and one reaching a pole
+        covers every longitude.
+        """
+        # No two points are further apart than half the circumference; larger
+        # values would only overflow the grid range.
+        km = min(km, math.pi * EARTH_RADIUS_KM)
+        lat_delta = km / (math.pi * EARTH_RADIUS_KM / 180)
+        south, north = latitude - lat_delta, latitude + lat_delta
+        cells = Q(grid_row__range=(grid_cell(max(south, -90), 0)[0], grid_cell(min(north, 90), 0)[0]))
+
+        lon_delta = lat_delta / max(math.cos(math.radians(latitude)), 0.01)
+        if south > -90 and north < 90 and lon_delta < 180:
+            west, east = longitude - lon_delta, longitude + lon_delta
+            if west < -180:
+                spans = [(west + 360, 180), (-180, east)]
+            elif east > 180:
+                spans = [(west, 180), (-180, east - 360)]
+            else:
+                spans = [(west, east)]
+            columns = Q()
+            for span_west, span_east in spans:
+                columns |= Q(grid_col__range=(grid_cell(0, span_west)[1], grid_cell(0, span_east)[1]))
+            cells &= columns
+
+        lat = math.radians(latitude)
+        lon = math.radians(longitude)
+        half_dlat = (Radians(F('latitude')) - Value(lat)) / 2
+        half_dlon = (Radians(F('longitude')) - Value(lon)) / 2
+        distance = 2 * EARTH_RADIUS_KM * ASin(Sqrt(
+            Power(Sin(half_dlat), 2)
+            + math.cos(lat) * Cos(Radians(F('latitude'))) * Power(Sin(half_dlon), 2)
+        ))
+        return self.filter(cells).annotate(
+            distance=models.ExpressionWrapper(distance, output_field=FloatField()),
+        ).filter(distance__lte=km)
+
+
+class Locality(models.Model):
+    locality_id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=100)
+    key = models.CharField(unique=True, max_length=100)
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    grid_row = models.IntegerField(blank=True, null=True, editable=False)
+    grid_col = models.IntegerField(blank=True, null=True, editable=False)
+
+    objects = LocalityQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'locality'
+        verbose_name_plural = 'localities'
+        indexes = [
+            models.Index(fields=['grid_row', 'grid_col'], name='locality_grid_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        self.key = normalize_locality(self.key or self.name)
+        if self.latitude is not None and self.longitude is not None:
+            self.grid_row, self.grid_col = grid_cell(self.latitude, self.longitude)
+        else:
+            self.grid_row = self.grid_col = None
+        super().save(*args, **kwargs)
+
+
+class LocalityAlias(models.Model):
+    key = models.CharField(unique=True, max_length=100)
+    locality = models.ForeignKey('Locality', models.CASCADE, related_name='aliases')
+
+    class Meta:
+        db_table = 'locality_alias'
+        verbose_name_plural = 'locality aliases'
+
+    def __str__(self):
+        return f"{self.key} -> {self.locality}"
+
+    def save(self, *args, **kwargs):
+        self.key = normalize_locality(self.key)
+        super().save(*args, **kwargs)
+
+
 class User(models.Model):
     user_id = models.AutoField(primary_key=True)
     email = models.CharField(unique=True, max_length=255)
@@ -22,6 +160,7 @@ class User(models.Model):
     phone_number = models.CharField(max_length=20, blank=True, null=True)
     profile_description = models.TextField(blank=True, null=True)
     password = models.CharField(max_length=255)
+    locality = models.ForeignKey('Locality', models.SET_NULL, blank=True, null=True, editable=False)
 
     class Meta:
         managed = False
@@ -30,6 +169,14 @@ class User(models.Model):
     def __str__(self):
         return f"{self.given_name} {self.surname}" if self.given_name or self.surname else self.email
 
+    # Set by BearerTokenAuthentication as request.user.
+    is_authenticated = True
+    is_anonymous = False
+
+    def save(self, *args, **kwargs):
+        self.locality = Locality.objects.resolve(self.city)
+        super().save(*args, **kwargs)
+
 
 class Caregiver(models.Model):
     caregiver_user = models.OneToOneField('User', models.CASCADE, primary_key=True)
@@ -64,6 +211,7 @@ class Address(models.Model):
     house_number = models.CharField(max_length=20, blank=True, null=True)
     street = models.CharField(max_length=255, blank=True, null=True)
     town = models.CharField(max_length=100, blank=True, null=True)
+    locality = models.ForeignKey('Locality', models.SET_NULL, blank=True, null=True, editable=False)
 
     class Meta:
         managed = False
@@ -72,6 +220,10 @@ class Address(models.Model):
     def __str__(self):
         return f"{self.house_number} {self.street}, {self.town}" if self.street else str(self.member_user)
 
+    def save(self, *args, **kwargs):
+        self.locality = Locality.objects.resolve(self.town)
+        super().save(*args, **kwargs)
+
 
 class Appointment(models.Model):
     appointment_id = models.AutoField(primary_key=True)
@@ -119,3 +271,25 @@ class JobApplication(models.Model):
         return f"{self.caregiver_user} applied for {self.job}"
 
 
+class Task(models.Model):
+    task_id = models.BigAutoField(primary_key=True)
+    name = models.CharField(max_length=255)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=TaskStatus.choices, default=TaskStatus.QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'task'
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='task_due_idx'),
+            models.Index(fields=['status', 'finished_at'], name='task_finished_idx'),
+        ]
+
+    def __str__(self):
+        return f"Task {self.task_id} - {self.name} ({self.status})"
@@ -0,0 +1,281 @@
+import fcntl
+import ipaddress
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.module_loading import import_string
+
+from .credentials import user_id_for_token
+
+logger = logging.getLogger(__name__)
+
+RATE_PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def parse_rate(rate):
+    """Turn ``'60/min'`` into ``(60, 1.0)``: the request count and tokens per second."""
+    count, period = rate.split('/')
+    return int(count), int(count) / RATE_PERIODS[period]
+
+
+class Limits:
+    def __init__(self, rate=None, burst=None, concurrency=None, concurrency_methods=('GET',),
+                 concurrency_timeout=30, scope=None):
+        self.rate = None
+        self.burst = None
+        if rate:
+            count, self.rate = parse_rate(rate)
+            self.burst = burst or count
+        self.concurrency = concurrency
+        self.concurrency_methods = concurrency_methods
+        self.concurrency_timeout = concurrency_timeout
+        self.scope = scope
+
+
+def rate_limit(view, **limits):
+    """Attach rate and concurrency limits to a view; enforced by RateLimitMiddleware.
+
+    ``rate`` is a token bucket refill rate such as ``'60/min'`` and ``burst`` its
+    capacity (defaults to the count in ``rate``), tracked per authenticated
+    user or client IP. ``concurrency`` caps simultaneous requests to the view across all
+    clients for ``concurrency_methods``.
+    """
+    target = getattr(view, 'view_class', view)
+    limits.setdefault('scope', f'{target.__module__}.{target.__name__}')
+    view.rate_limits = Limits(**limits)
+    return view
+
+
+class BaseBackend:
+    """Token buckets and concurrency slots kept in a dict guarded by ``transaction()``."""
+
+    def __init__(self, **options):
+        pass
+
+    @contextmanager
+    def transaction(self):
+        raise NotImplementedError
+
+    def consume(self, key, rate, burst):
+        """Take a token from the bucket; return 0 on success or the seconds to wait."""
+        with self.transaction() as state:
+            return self._consume(state, time.time(), key, rate, burst)
+
+    def acquire(self, key, limit, timeout):
+        """Claim one of ``limit`` slots for ``key``; return a release token or None.
+
+        Slots expire after ``timeout`` seconds so a crashed worker cannot leak them.
+        """
+        with self.transaction() as state:
+            return self._acquire(state, time.time(), key, limit, timeout)
+
+    def admit(self, bucket, rate, burst, slot, limit, timeout):
+        """``consume()`` then ``acquire()`` in one transaction; return ``(wait, token)``.
+
+        Either key may be None to skip that check. No slot is taken when the
+        rate limit refuses the request.
+        """
+        now = time.time()
+        with self.transaction() as state:
+            wait = self._consume(state, now, bucket, rate, burst) if bucket else 0
+            if wait or not slot:
+                return wait, None
+            return 0, self._acquire(state, now, slot, limit, timeout)
+
+    def _consume(self, state, now, key, rate, burst):
+        buckets = state.setdefault('buckets', {})
+        tokens, updated, _ = buckets.get(key, (burst, now, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        wait = 0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+        for other, (_, _, full_at) in list(buckets.items()):
+            if full_at <= now:
+                del buckets[other]
+        return wait
+
+    def _acquire(self, state, now, key, limit, timeout):
+        slots = state.setdefault('slots', {})
+        held = {token: expires for token, expires in slots.get(key, {}).items() if expires > now}
+        if len(held) >= limit:
+            slots[key] = held
+            return None
+        token = uuid.uuid4().hex
+        held[token] = now + timeout
+        slots[key] = held
+        return token
+
+    def release(self, key, token):
+        with self.transaction() as state:
+            slots = state.get('slots', {})
+            slots.get(key, {}).pop(token, None)
+            if not slots.get(key, True):
+                del slots[key]
+
+
+class LocalBackend(BaseBackend):
+    """State in process memory: limits apply to each worker separately."""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._lock = threading.Lock()
+        self._state = {}
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            yield self._state
+
+
+class FileBackend(BaseBackend):
+    """State in a JSON file shared by every worker on the host.
+
+    Writers hold flock() on a separate lock file and swap in a complete new
+    state file with os.replace(), so a worker dying mid-write cannot leave a
+    truncated file behind.
+    """
+
+    def __init__(self, path, **options):
+        super().__init__(**options)
+        self.path = os.fspath(path)
+        # Like FileBasedCache, keep the directory private to the app's user.
+        os.makedirs(os.path.dirname(self.path) or '.', 0o700, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            logger.warning("Discarding unreadable rate limit state in %s", self.path)
+            return {}
+
+    def _write(self, state):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or '.', prefix='.ratelimit-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @contextmanager
+    def transaction(self):
+        with self._lock, open(self.path + '.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                state = self._read()
+                yield state
+                self._write(state)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    config = settings.RATE_LIMIT_BACKEND
+    return import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+
+
+@lru_cache(maxsize=None)
+def trusted_proxies():
+    return tuple(
+        ipaddress.ip_network(proxy, strict=False)
+        for proxy in getattr(settings, 'RATE_LIMIT_TRUSTED_PROXIES', ())
+    )
+
+
+def _is_trusted(address):
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies())
+
+
+def client_ip(request):
+    """The address of the client, looking through trusted proxies only.
+
+    X-Forwarded-For is read from the right, skipping hops that are trusted
+    proxies; anything a client wrote further left cannot be trusted.
+    """
+    address = request.META.get('REMOTE_ADDR', '')
+    if not _is_trusted(address):
+        return address
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    for hop in reversed([hop.strip() for hop in forwarded.split(',') if hop.strip()]):
+        address = hop
+        if not _is_trusted(hop):
+            break
+    return address
+
+
+def client_identity(request):
+    """Bucket key: the user of a valid bearer token, else the client IP.
+
+    Credentials that have not been checked are ignored, as a client could mint
+    a fresh bucket per request with them.
+    """
+    auth = request.headers.get('Authorization', '').split()
+    if len(auth) == 2 and auth[0].lower() == 'bearer':
+        user_id = user_id_for_token(auth[1])
+        if user_id is not None:
+            return f'user:{user_id}'
+    return 'ip:' + client_ip(request)
+
+
+def too_many_requests(message, status, retry_after):
+    response = JsonResponse({'error': message}, status=status)
+    response['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+    return response
+
+
+class RateLimitMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            slot = getattr(request, '_rate_limit_slot', None)
+            if slot is not None:
+                get_backend().release(*slot)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        limits = getattr(view_func, 'rate_limits', None)
+        if limits is None:
+            return None
+        bucket = slot = None
+        if limits.rate:
+            bucket = f'{limits.scope}:{client_identity(request)}'
+        if limits.concurrency and request.method in limits.concurrency_methods:
+            slot = f'{limits.scope}:{request.method}'
+        if bucket is None and slot is None:
+            return None
+
+        wait, token = get_backend().admit(
+            bucket, limits.rate, limits.burst, slot, limits.concurrency, limits.concurrency_timeout,
+        )
+        if wait:
+            return too_many_requests('Too many requests', 429, wait)
+        if slot is not None:
+            if token is None:
+                return too_many_requests('Server is busy, try again later', 503, 1)
+            request._rate_limit_slot = (slot, token)
+        return None
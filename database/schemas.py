@@ -0,0 +1,282 @@
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+
+from . import views
+
+
+def document(view, *decorators):
+    """Attach swagger_auto_schema overrides to an already defined view.
+
+    Kept out of ``views`` so the API can be served without importing drf_yasg.
+    """
+    for decorator in reversed(decorators):
+        decorator(view)
+
+
+user_schema = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        'user_id': openapi.Schema(type=openapi.TYPE_INTEGER, read_only=True),
+        'email': openapi.Schema(type=openapi.TYPE_STRING, description='User email address'),
+        'given_name': openapi.Schema(type=openapi.TYPE_STRING, description='First name'),
+        'surname': openapi.Schema(type=openapi.TYPE_STRING, description='Last name'),
+        'city': openapi.Schema(type=openapi.TYPE_STRING, description='City'),
+        'phone_number': openapi.Schema(type=openapi.TYPE_STRING, description='Phone number'),
+        'profile_description': openapi.Schema(type=openapi.TYPE_STRING, description='Profile description'),
+        'password': openapi.Schema(type=openapi.TYPE_STRING, description='Password (stored hashed, never returned)'),
+    },
+    required=['email', 'password']
+)
+
+
+document(
+    views.user_list_create,
+    swagger_auto_schema(
+        method='get',
+        operation_description="Retrieve a list of all users",
+        responses={200: openapi.Response('List of users', user_schema)}
+    ),
+    swagger_auto_schema(
+        method='post',
+        operation_description="Create a new user",
+        request_body=user_schema,
+        responses={201: openapi.Response('User created', user_schema), 400: 'Bad request'}
+    ),
+)
+
+
+document(
+    views.user_detail,
+    swagger_auto_schema(
+        method='get',
+        operation_description="Retrieve a specific user by ID",
+        responses={200: openapi.Response('User details', user_schema), 404: 'User not found'}
+    ),
+    swagger_auto_schema(
+        method='put',
+        operation_description="Update a specific user",
+        request_body=user_schema,
+        responses={200: openapi.Response('User updated', user_schema), 400: 'Bad request', 404: 'User not found'}
+    ),
+    swagger_auto_schema(
+        method='delete',
+        operation_description="Delete a specific user",
+        responses={204: 'User deleted', 404: 'User not found'}
+    ),
+)
+
+
+auth_token_request_schema = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        'email': openapi.Schema(type=openapi.TYPE_STRING, description='User email address'),
+        'password': openapi.Schema(type=openapi.TYPE_STRING, description='Password'),
+    },
+    required=['email', 'password']
+)
+
+auth_token_schema = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        'token': openapi.Schema(type=openapi.TYPE_STRING, description='Send as "Authorization: Bearer <token>"'),
+        'token_type': openapi.Schema(type=openapi.TYPE_STRING, enum=['Bearer']),
+        'expires_in': openapi.Schema(type=openapi.TYPE_INTEGER, description='Seconds until the token expires'),
+        'user_id': openapi.Schema(type=openapi.TYPE_INTEGER),
+    }
+)
+
+
+document(
+    views.auth_token,
+    swagger_auto_schema(
+        method='post',
+        operation_description="Exchange an email and password for a short-lived bearer token",
+        request_body=auth_token_request_schema,
+        responses={200: openapi.Response('Token issued', auth_token_schema), 400: 'Bad request', 401: 'Invalid email or password', 503: 'Server busy'}
+    ),
+)
+
+
+caregiver_schema = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        'caregiver_user_id': openapi.Schema(type=openapi.TYPE_INTEGER, description='User ID (foreign key)'),
+        'photo': openapi.Schema(type=openapi.TYPE_STRING, description='Photo URL or base64'),
+        'gender': openapi.Schema(type=openapi.TYPE_STRING, description='Gender'),
+        'caregiving_type': openapi.Schema(type=openapi.TYPE_STRING, enum=['babysitter', 'caregiver for elderly', 'playmate for children']),
+        'hourly_rate': openapi.Schema(type=openapi.TYPE_NUMBER, description='Hourly rate'),
+    },
+    required=['caregiver_user_id', 'caregiving_type']
+)
+
+
+document(
+    views.caregiver_list_create,
+    swagger_auto_schema(
+        method='get',
+        operation_description="List all caregivers, optionally only those living in a city",
+        manual_parameters=[
+            openapi.Parameter('city', openapi.IN_QUERY, description='City name, matched case- and accent-insensitively', type=openapi.TYPE_STRING),
+        ]
+    ),
+    swagger_auto_schema(method='post', operation_description="Create a new caregiver", request_body=caregiver_schema),
+)
+
+
+document(
+    views.caregiver_detail,
+    swagger_auto_schema(method='get', operation_description="Get a specific caregiver"),
+    swagger_auto_schema(method='put', operation_description="Update a caregiver", request_body=caregiver_schema),
+    swagger_auto_schema(method='delete', operation_description="Delete a caregiver"),
+)
+
+
+member_schema = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        'member_user_id': openapi.Schema(type=openapi.TYPE_INTEGER, description='User ID (foreign key)'),
+        'house_rules': openapi.Schema(type=openapi.TYPE_STRING, description='House rules'),
+        'dependent_description': openapi.Schema(type=openapi.TYPE_STRING, description='Dependent description'),
+    },
+    required=['member_user_id']
+)
+
+
+document(
+    views.member_list_create,
+    swagger_auto_schema(method='get', operation_description="List all members"),
+    swagger_auto_schema(method='post', operation_description="Create a new member", request_body=member_schema),
+)
+
+
+document(
+    views.member_detail,
+    swagger_auto_schema(method='get', operation_description="Get a specific member"),
+    swagger_auto_schema(method='put', operation_description="Update a member", request_body=member_schema),
+    swagger_auto_schema(method='delete', operation_description="Delete a member"),
+)
+
+
+document(
+    views.member_nearby_caregivers,
+    swagger_auto_schema(
+        method='get',
+        operation_description="List caregivers living within a distance of the member's address",
+        manual_parameters=[
+            openapi.Parameter('km', openapi.IN_QUERY, description='Search radius in kilometres (default 10)', type=openapi.TYPE_NUMBER),
+            openapi.Parameter('caregiving_type', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['babysitter', 'caregiver for elderly', 'playmate for children']),
+        ],
+        responses={200: openapi.Response('Nearby caregivers', openapi.Schema(type=openapi.TYPE_ARRAY, items=caregiver_schema)), 400: 'Address location unknown or invalid km', 404: 'Address not found'}
+    ),
+)
+
+
+address_schema = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        'member_user_id': openapi.Schema(type=openapi.TYPE_INTEGER, description='Member ID (foreign key)'),
+        'house_number': openapi.Schema(type=openapi.TYPE_STRING, description='House number'),
+        'street': openapi.Schema(type=openapi.TYPE_STRING, description='Street name'),
+        'town': openapi.Schema(type=openapi.TYPE_STRING, description='Town/City'),
+    },
+    required=['member_user_id']
+)
+
+
+document(
+    views.address_list_create,
+    swagger_auto_schema(method='get', operation_description="List all addresses"),
+    swagger_auto_schema(method='post', operation_description="Create a new address", request_body=address_schema),
+)
+
+
+document(
+    views.address_detail,
+    swagger_auto_schema(method='get', operation_description="Get a specific address"),
+    swagger_auto_schema(method='put', operation_description="Update an address", request_body=address_schema),
+    swagger_auto_schema(method='delete', operation_description="Delete an address"),
+)
+
+
+job_schema = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        'job_id': openapi.Schema(type=openapi.TYPE_INTEGER, read_only=True),
+        'member_user_id': openapi.Schema(type=openapi.TYPE_INTEGER, description='Member ID (foreign key)'),
+        'required_caregiving_type': openapi.Schema(type=openapi.TYPE_STRING, enum=['babysitter', 'caregiver for elderly', 'playmate for children']),
+        'other_requirements': openapi.Schema(type=openapi.TYPE_STRING, description='Other requirements'),
+        'date_posted': openapi.Schema(type=openapi.FORMAT_DATE, description='Date posted'),
+    },
+    required=['member_user_id', 'required_caregiving_type']
+)
+
+
+document(
+    views.job_list_create,
+    swagger_auto_schema(method='get', operation_description="List all jobs"),
+    swagger_auto_schema(method='post', operation_description="Create a new job", request_body=job_schema),
+)
+
+
+document(
+    views.job_detail,
+    swagger_auto_schema(method='get', operation_description="Get a specific job"),
+    swagger_auto_schema(method='put', operation_description="Update a job", request_body=job_schema),
+    swagger_auto_schema(method='delete', operation_description="Delete a job"),
+)
+
+
+job_application_schema = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        'caregiver_user_id': openapi.Schema(type=openapi.TYPE_INTEGER, description='Caregiver ID (foreign key)'),
+        'job_id': openapi.Schema(type=openapi.TYPE_INTEGER, description='Job ID (foreign key)'),
+        'date_applied': openapi.Schema(type=openapi.FORMAT_DATE, description='Date applied'),
+    },
+    required=['caregiver_user_id', 'job_id']
+)
+
+
+document(
+    views.job_application_list_create,
+    swagger_auto_schema(method='get', operation_description="List all job applications"),
+    swagger_auto_schema(method='post', operation_description="Create a new job application", request_body=job_application_schema),
+)
+
+
+document(
+    views.job_application_detail,
+    swagger_auto_schema(method='get', operation_description="Get a specific job application"),
+    swagger_auto_schema(method='put', operation_description="Update a job application", request_body=job_application_schema),
+    swagger_auto_schema(method='delete', operation_description="Delete a job application"),
+)
+
+
+appointment_schema = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    properties={
+        'appointment_id': openapi.Schema(type=openapi.TYPE_INTEGER, read_only=True),
+        'caregiver_user_id': openapi.Schema(type=openapi.TYPE_INTEGER, description='Caregiver ID (foreign key)'),
+        'member_user_id': openapi.Schema(type=openapi.TYPE_INTEGER, description='Member ID (foreign key)'),
+        'appointment_date': openapi.Schema(type=openapi.FORMAT_DATE, description='Appointment date'),
+        'appointment_time': openapi.Schema(type=openapi.TYPE_STRING, description='Appointment time (HH:MM:SS)'),
+        'work_hours': openapi.Schema(type=openapi.TYPE_NUMBER, description='Work hours'),
+        'status': openapi.Schema(type=openapi.TYPE_STRING, enum=['Pending', 'Confirmed', 'Declined'], description='Appointment status'),
+    },
+    required=['caregiver_user_id', 'member_user_id', 'appointment_date', 'appointment_time', 'work_hours']
+)
+
+
+document(
+    views.appointment_list_create,
+    swagger_auto_schema(method='get', operation_description="List all appointments"),
+    swagger_auto_schema(method='post', operation_description="Create a new appointment", request_body=appointment_schema),
+)
+
+
+document(
+    views.appointment_detail,
+    swagger_auto_schema(method='get', operation_description="Get a specific appointment"),
+    swagger_auto_schema(method='put', operation_description="Update an appointment", request_body=appointment_schema),
+    swagger_auto_schema(method='delete', operation_description="Delete an appointment"),
+)
@@ -0,0 +1,224 @@
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Max, Min, Q
+from django.utils import timezone
+
+from .models import Task, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+class PartialFailure(Exception):
+    """Raised by a batch handler when only some payloads failed.
+
+    ``errors`` maps the index of each failed payload to its error message;
+    the other payloads count as done and are not retried.
+    """
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} payload(s) failed")
+        self.errors = errors
+
+
+def queue_setting(name):
+    defaults = {
+        'BATCH_SIZE': 50,
+        'POLL_INTERVAL': 1.0,
+        'RETRY_DELAY': 30,
+        'STALLED_AFTER': 600,
+        'RETENTION': 7 * 24 * 60 * 60,
+        'PURGE_INTERVAL': 60,
+    }
+    return getattr(settings, 'TASK_QUEUE', {}).get(name, defaults[name])
+
+
+class TaskHandler:
+    def __init__(self, func, name, batch, max_attempts):
+        self.func = func
+        self.name = name
+        self.batch = batch
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, delay=0, **payload):
+        """Store a task row for the worker; call inside the transaction of the write it follows."""
+        return Task.objects.create(
+            name=self.name,
+            payload=payload,
+            max_attempts=self.max_attempts,
+            run_at=timezone.now() + timedelta(seconds=delay),
+        )
+
+
+def task(name=None, batch=False, max_attempts=5):
+    """Register a task handler.
+
+    Batch handlers receive a list of payloads claimed together and raise
+    PartialFailure for the ones that failed; other handlers are called with one
+    payload as keyword arguments.
+    """
+    def decorator(func):
+        handler = TaskHandler(func, name or f'{func.__module__}.{func.__name__}', batch, max_attempts)
+        TASKS[handler.name] = handler
+        return handler
+    return decorator
+
+
+def claim(batch_size):
+    """Lock and mark running the next due tasks, all with the same name.
+
+    SKIP LOCKED lets any number of workers claim concurrently without waiting
+    on each other's rows.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        due = (
+            Task.objects.select_for_update(skip_locked=True)
+            .filter(status=TaskStatus.QUEUED, run_at__lte=now)
+            .order_by('run_at', 'task_id')
+        )
+        first = due.first()
+        if first is None:
+            return []
+        handler = TASKS.get(first.name)
+        limit = batch_size if handler is not None and handler.batch else 1
+        tasks = list(due.filter(name=first.name)[:limit])
+        Task.objects.filter(pk__in=[t.pk for t in tasks]).update(
+            status=TaskStatus.RUNNING,
+            started_at=now,
+            attempts=F('attempts') + 1,
+        )
+    for t in tasks:
+        t.status, t.started_at, t.attempts = TaskStatus.RUNNING, now, t.attempts + 1
+    return tasks
+
+
+def execute(tasks):
+    """Run claimed tasks and record the outcome; return how many succeeded."""
+    name = tasks[0].name
+    errors = {}
+    try:
+        handler = TASKS[name]
+        if handler.batch:
+            handler([t.payload for t in tasks])
+        else:
+            handler(**tasks[0].payload)
+    except PartialFailure as e:
+        errors = e.errors
+        logger.error("Task %s failed for %d of %d payload(s)", name, len(errors), len(tasks))
+    except Exception:
+        error = traceback.format_exc()
+        errors = dict.fromkeys(range(len(tasks)), error)
+        logger.exception("Task %s failed for %d payload(s)", name, len(tasks))
+
+    now = timezone.now()
+    failed = []
+    for index, error in errors.items():
+        t = tasks[index]
+        if t.attempts >= t.max_attempts:
+            t.status, t.finished_at = TaskStatus.FAILED, now
+        else:
+            t.status = TaskStatus.QUEUED
+            t.run_at = now + timedelta(seconds=queue_setting('RETRY_DELAY') * 2 ** (t.attempts - 1))
+        t.last_error = error
+        failed.append(t)
+    if failed:
+        Task.objects.bulk_update(failed, ['status', 'run_at', 'finished_at', 'last_error'])
+    done = [t.pk for index, t in enumerate(tasks) if index not in errors]
+    if done:
+        Task.objects.filter(pk__in=done).update(status=TaskStatus.DONE, finished_at=now)
+    return len(done)
+
+
+def requeue_stalled():
+    """Put back tasks whose worker died while running them.
+
+    Tasks that have used up their attempts are failed instead, so a payload
+    that kills its worker is not retried forever.
+    """
+    now = timezone.now()
+    stalled = Task.objects.filter(
+        status=TaskStatus.RUNNING, started_at__lt=now - timedelta(seconds=queue_setting('STALLED_AFTER')),
+    )
+    with transaction.atomic():
+        failed = stalled.filter(attempts__gte=F('max_attempts')).update(
+            status=TaskStatus.FAILED, finished_at=now, last_error="Worker stopped while running the task",
+        )
+        requeued = stalled.update(status=TaskStatus.QUEUED)
+    return requeued + failed
+
+
+def purge_finished():
+    """Delete done tasks older than the RETENTION setting; failed ones are kept."""
+    cutoff = timezone.now() - timedelta(seconds=queue_setting('RETENTION'))
+    deleted, _ = Task.objects.filter(status=TaskStatus.DONE, finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def work(batch_size=None, poll_interval=None, burst=False):
+    """Claim and run tasks until the queue is empty (``burst``) or forever.
+
+    Returns the number of tasks that succeeded.
+    """
+    import database.tasks  # noqa: F401  registers the handlers
+
+    batch_size = batch_size or queue_setting('BATCH_SIZE')
+    poll_interval = poll_interval or queue_setting('POLL_INTERVAL')
+    processed = 0
+    purged_at = 0
+    while True:
+        try:
+            tasks = claim(batch_size)
+        except DatabaseError:
+            # e.g. a dropped connection; back off and reconnect rather than exit.
+            logger.exception("Could not claim tasks")
+            close_old_connections()
+            time.sleep(poll_interval)
+            continue
+        if tasks:
+            processed += execute(tasks)
+        elif burst:
+            return processed
+        else:
+            requeue_stalled()
+            if time.monotonic() - purged_at >= queue_setting('PURGE_INTERVAL'):
+                purge_finished()
+                purged_at = time.monotonic()
+            time.sleep(poll_interval)
+
+
+def queue_stats(window=timedelta(hours=1)):
+    """Depth and latency per task name.
+
+    ``oldest_wait`` is how long the oldest due task has been waiting;
+    ``avg_latency`` and ``avg_duration`` cover tasks finished within ``window``.
+    """
+    now = timezone.now()
+    latency = ExpressionWrapper(F('started_at') - F('run_at'), output_field=DurationField())
+    duration = ExpressionWrapper(F('finished_at') - F('started_at'), output_field=DurationField())
+    recent = Q(status=TaskStatus.DONE, finished_at__gte=now - window)
+    rows = Task.objects.values('name').annotate(
+        queued=Count('pk', filter=Q(status=TaskStatus.QUEUED)),
+        running=Count('pk', filter=Q(status=TaskStatus.RUNNING)),
+        failed=Count('pk', filter=Q(status=TaskStatus.FAILED)),
+        done_recently=Count('pk', filter=recent),
+        oldest_due=Min('run_at', filter=Q(status=TaskStatus.QUEUED, run_at__lte=now)),
+        avg_latency=Avg(latency, filter=recent),
+        avg_duration=Avg(duration, filter=recent),
+        max_latency=Max(latency, filter=recent),
+    ).order_by('name')
+    stats = []
+    for row in rows:
+        oldest_due = row.pop('oldest_due')
+        row['oldest_wait'] = now - oldest_due if oldest_due else None
+        stats.append(row)
+    return stats
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+from .models import Appointment, JobApplication
+from .taskqueue import PartialFailure, task
+
+
+def send_each(messages):
+    """Send one message per payload over a shared connection.
+
+    ``messages`` maps payload index to an EmailMessage; payloads whose object
+    no longer exists have none. A failed recipient only fails its own payload,
+    so the others are not mailed again on retry.
+    """
+    errors = {}
+    with get_connection() as connection:
+        for index, message in messages.items():
+            message.connection = connection
+            try:
+                message.send()
+            except Exception as e:
+                errors[index] = repr(e)
+    if errors:
+        raise PartialFailure(errors)
+
+
+@task(batch=True)
+def notify_appointment_requested(payloads):
+    appointments = Appointment.objects.select_related(
+        'member_user__member_user', 'caregiver_user__caregiver_user',
+    ).in_bulk([p['appointment_id'] for p in payloads])
+    messages = {}
+    for index, payload in enumerate(payloads):
+        appointment = appointments.get(payload['appointment_id'])
+        if appointment is not None:
+            messages[index] = EmailMessage(
+                "New appointment request",
+                f"{appointment.caregiver_user} has an appointment with you on "
+                f"{appointment.appointment_date} at {appointment.appointment_time} "
+                f"for {appointment.work_hours} hours (status: {appointment.status}).",
+                settings.DEFAULT_FROM_EMAIL,
+                [appointment.member_user.member_user.email],
+            )
+    send_each(messages)
+
+
+@task(batch=True)
+def notify_job_application(payloads):
+    applications = JobApplication.objects.select_related(
+        'job__member_user__member_user', 'caregiver_user__caregiver_user',
+    ).in_bulk([p['application_id'] for p in payloads])
+    messages = {}
+    for index, payload in enumerate(payloads):
+        application = applications.get(payload['application_id'])
+        if application is not None:
+            messages[index] = EmailMessage(
+                "New application for your job",
+                f"{application.caregiver_user} applied for your job {application.job}.",
+                settings.DEFAULT_FROM_EMAIL,
+                [application.job.member_user.member_user.email],
+            )
+    send_each(messages)
@@ -1,3 +1,634 @@
-from django.test import TestCase
+import io
+import json
+import math
+import os
+import signal
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework import exceptions
+
+from . import credentials, ratelimit, taskqueue
+from .models import (
+    Address, Caregiver, Locality, LocalityAlias, Member, Task, TaskStatus, User, grid_cell, normalize_locality,
+)
+from .ratelimit import FileBackend, LocalBackend, RateLimitMiddleware, rate_limit
+
+
+def limited_view(request):
+    return HttpResponse('ok')
+
+
+class TokenBucketTests(SimpleTestCase):
+    def setUp(self):
+        self.backend = LocalBackend()
+        patcher = mock.patch('database.ratelimit.time.time', return_value=1000.0)
+        self.clock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_then_wait_for_refill(self):
+        # 2 requests/min, burst of 2: one token every 30 seconds.
+        self.assertEqual(self.backend.consume('k', 2 / 60, 2), 0)
+        self.assertEqual(self.backend.consume('k', 2 / 60, 2), 0)
+        self.assertAlmostEqual(self.backend.consume('k', 2 / 60, 2), 30)
+
+        self.clock.return_value += 10
+        self.assertAlmostEqual(self.backend.consume('k', 2 / 60, 2), 20)
+
+        self.clock.return_value += 20
+        self.assertEqual(self.backend.consume('k', 2 / 60, 2), 0)
+
+    def test_buckets_are_per_key(self):
+        self.assertEqual(self.backend.consume('a', 1 / 60, 1), 0)
+        self.assertNotEqual(self.backend.consume('a', 1 / 60, 1), 0)
+        self.assertEqual(self.backend.consume('b', 1 / 60, 1), 0)
+
+    def test_full_buckets_are_dropped(self):
+        self.backend.consume('k', 1, 5)
+        self.clock.return_value += 60
+        self.backend.consume('other', 1, 5)
+        self.assertNotIn('k', self.backend._state['buckets'])
+
+
+class ConcurrencySlotTests(SimpleTestCase):
+    def test_admit_checks_rate_then_slot(self):
+        backend = LocalBackend()
+        wait, token = backend.admit('bucket', 1 / 60, 1, 'slot', 1, 30)
+        self.assertEqual(wait, 0)
+        self.assertIsNotNone(token)
+        self.assertEqual(backend.admit(None, None, None, 'slot', 1, 30), (0, None))
+        wait, token = backend.admit('bucket', 1 / 60, 1, None, None, None)
+        self.assertGreater(wait, 0)
+        self.assertIsNone(token)
+
+    def test_release_frees_slot(self):
+        backend = LocalBackend()
+        first = backend.acquire('k', 1, 30)
+        self.assertIsNotNone(first)
+        self.assertIsNone(backend.acquire('k', 1, 30))
+        backend.release('k', first)
+        self.assertIsNotNone(backend.acquire('k', 1, 30))
+
+    def test_slots_expire(self):
+        backend = LocalBackend()
+        with mock.patch('database.ratelimit.time.time', return_value=1000.0):
+            backend.acquire('k', 1, 30)
+        with mock.patch('database.ratelimit.time.time', return_value=1031.0):
+            self.assertIsNotNone(backend.acquire('k', 1, 30))
+
+
+class FileBackendTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'state.json')
+
+    def test_state_is_shared_between_instances(self):
+        FileBackend(self.path).consume('k', 1 / 60, 1)
+        self.assertNotEqual(FileBackend(self.path).consume('k', 1 / 60, 1), 0)
+
+    def test_corrupt_state_is_discarded(self):
+        with open(self.path, 'w') as f:
+            f.write('{"buckets": {')
+        with self.assertLogs('database.ratelimit', 'WARNING'):
+            self.assertEqual(FileBackend(self.path).consume('k', 1, 1), 0)
+        with open(self.path) as f:
+            self.assertIn('k', json.load(f)['buckets'])
+
+
+@override_settings(
+    RATE_LIMIT_BACKEND={'BACKEND': 'database.ratelimit.LocalBackend'},
+    RATE_LIMIT_TRUSTED_PROXIES=['10.0.0.0/8'],
+    CACHES={'tokens': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'ratelimit-test'}},
+    AUTH_TOKEN_CACHE='tokens',
+)
+class RateLimitMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        ratelimit.get_backend.cache_clear()
+        ratelimit.trusted_proxies.cache_clear()
+        self.addCleanup(ratelimit.get_backend.cache_clear)
+        self.addCleanup(ratelimit.trusted_proxies.cache_clear)
+        self.factory = RequestFactory()
+
+    def call(self, view, request):
+        middleware = RateLimitMiddleware(lambda request: (
+            middleware.process_view(request, view, (), {}) or view(request)
+        ))
+        return middleware(request)
+
+    def test_429_with_retry_after(self):
+        view = rate_limit(limited_view, rate='1/min')
+        self.assertEqual(self.call(view, self.factory.get('/')).status_code, 200)
+        response = self.call(view, self.factory.get('/'))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '60')
+
+    def test_unverified_credentials_do_not_get_a_new_bucket(self):
+        view = rate_limit(limited_view, rate='1/min')
+        self.call(view, self.factory.get('/'))
+        for header in ('X-Api-Key', 'Authorization'):
+            request = self.factory.get('/', headers={header: 'Bearer made-up'})
+            self.assertEqual(self.call(view, request).status_code, 429)
+
+    def test_valid_bearer_token_gets_own_bucket(self):
+        view = rate_limit(limited_view, rate='1/min')
+        self.call(view, self.factory.get('/'))
+        token = credentials.issue_token(User(user_id=7))
+        request = self.factory.get('/', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(self.call(view, request).status_code, 200)
+        self.assertEqual(self.call(view, request).status_code, 429)
+
+    def test_rate_limited_request_takes_no_slot(self):
+        view = rate_limit(limited_view, rate='1/min', concurrency=1)
+        self.call(view, self.factory.get('/'))
+        self.assertEqual(self.call(view, self.factory.get('/')).status_code, 429)
+        self.assertEqual(ratelimit.get_backend()._state['slots'], {})
+
+    def test_clients_behind_trusted_proxy(self):
+        view = rate_limit(limited_view, rate='1/min')
+
+        def via_gateway(forwarded_for):
+            return self.factory.get('/', REMOTE_ADDR='10.0.0.2', HTTP_X_FORWARDED_FOR=forwarded_for)
+
+        self.assertEqual(self.call(view, via_gateway('203.0.113.1')).status_code, 200)
+        self.assertEqual(self.call(view, via_gateway('203.0.113.2')).status_code, 200)
+        # A spoofed leftmost entry does not change the address the gateway saw.
+        self.assertEqual(self.call(view, via_gateway('198.51.100.9, 203.0.113.1')).status_code, 429)
+
+    def test_forwarded_for_ignored_from_untrusted_peer(self):
+        self.assertEqual(
+            ratelimit.client_ip(self.factory.get('/', REMOTE_ADDR='192.0.2.1', HTTP_X_FORWARDED_FOR='203.0.113.1')),
+            '192.0.2.1',
+        )
+
+    def test_concurrency_slot_released_after_response(self):
+        view = rate_limit(limited_view, concurrency=1)
+        self.assertEqual(self.call(view, self.factory.get('/')).status_code, 200)
+        self.assertEqual(self.call(view, self.factory.get('/')).status_code, 200)
+
+    def test_concurrency_limit_returns_503(self):
+        view = rate_limit(limited_view, concurrency=1)
+        ratelimit.get_backend().acquire(view.rate_limits.scope + ':GET', 1, 30)
+        response = self.call(view, self.factory.get('/'))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+
+@override_settings(TASK_QUEUE={'RETRY_DELAY': 10, 'RETENTION': 3600})
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        self.registered = dict(taskqueue.TASKS)
+        self.addCleanup(self.restore_tasks)
+
+    def restore_tasks(self):
+        taskqueue.TASKS.clear()
+        taskqueue.TASKS.update(self.registered)
+
+    def register(self, func, name='test.task', **options):
+        return taskqueue.task(name=name, **options)(func)
+
+    def test_claim_marks_due_tasks_running(self):
+        handler = self.register(lambda **payload: None)
+        due = handler.enqueue(n=1)
+        handler.enqueue(delay=60, n=2)
+        claimed = taskqueue.claim(10)
+        self.assertEqual([t.pk for t in claimed], [due.pk])
+        due.refresh_from_db()
+        self.assertEqual((due.status, due.attempts), (TaskStatus.RUNNING, 1))
+        self.assertEqual(taskqueue.claim(10), [])
+
+    def test_claim_batches_one_name(self):
+        batch = self.register(lambda payloads: None, name='test.batch', batch=True)
+        single = self.register(lambda **payload: None, name='test.single')
+        for n in range(3):
+            batch.enqueue(n=n)
+        single.enqueue()
+        self.assertEqual(len(taskqueue.claim(2)), 2)
+        self.assertEqual(len(taskqueue.claim(10)), 1)
+        self.assertEqual([t.name for t in taskqueue.claim(10)], [single.name])
+
+    def test_failure_retries_with_backoff_then_fails(self):
+        def flaky():
+            raise RuntimeError('boom')
+
+        handler = self.register(flaky, max_attempts=2)
+        task = handler.enqueue()
+
+        before = timezone.now()
+        with self.assertLogs('database.taskqueue', 'ERROR'):
+            self.assertEqual(taskqueue.execute(taskqueue.claim(1)), 0)
+        task.refresh_from_db()
+        self.assertEqual(task.status, TaskStatus.QUEUED)
+        self.assertIn('boom', task.last_error)
+        self.assertGreaterEqual(task.run_at, before + timedelta(seconds=10))
+
+        Task.objects.filter(pk=task.pk).update(run_at=timezone.now())
+        with self.assertLogs('database.taskqueue', 'ERROR'):
+            taskqueue.execute(taskqueue.claim(1))
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), (TaskStatus.FAILED, 2))
+        self.assertIsNotNone(task.finished_at)
+
+    def test_backoff_doubles(self):
+        handler = self.register(lambda: 1 / 0)
+        task = handler.enqueue()
+        Task.objects.filter(pk=task.pk).update(attempts=2)
+        before = timezone.now()
+        with self.assertLogs('database.taskqueue', 'ERROR'):
+            taskqueue.execute(taskqueue.claim(1))
+        task.refresh_from_db()
+        self.assertGreaterEqual(task.run_at, before + timedelta(seconds=40))
+
+    def test_partial_failure_only_retries_failed_payloads(self):
+        def notify(payloads):
+            raise taskqueue.PartialFailure({1: 'bad address'})
+
+        handler = self.register(notify, batch=True)
+        tasks = [handler.enqueue(n=n) for n in range(3)]
+        with self.assertLogs('database.taskqueue', 'ERROR'):
+            self.assertEqual(taskqueue.execute(taskqueue.claim(10)), 2)
+        statuses = dict(Task.objects.values_list('pk', 'status'))
+        self.assertEqual(
+            [statuses[t.pk] for t in tasks],
+            [TaskStatus.DONE, TaskStatus.QUEUED, TaskStatus.DONE],
+        )
+
+    def test_requeue_stalled(self):
+        handler = self.register(lambda: None)
+        task = handler.enqueue()
+        taskqueue.claim(1)
+        Task.objects.filter(pk=task.pk).update(started_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(taskqueue.requeue_stalled(), 1)
+        task.refresh_from_db()
+        self.assertEqual(task.status, TaskStatus.QUEUED)
+
+    def test_stalled_task_out_of_attempts_fails(self):
+        handler = self.register(lambda: None, max_attempts=1)
+        task = handler.enqueue()
+        taskqueue.claim(1)
+        Task.objects.filter(pk=task.pk).update(started_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(taskqueue.requeue_stalled(), 1)
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), (TaskStatus.FAILED, 1))
+        self.assertIsNotNone(task.finished_at)
+        self.assertIn('Worker stopped', task.last_error)
+
+    def test_purge_finished_keeps_recent_and_failed(self):
+        handler = self.register(lambda: None)
+        old, recent, failed = handler.enqueue(), handler.enqueue(), handler.enqueue()
+        long_ago = timezone.now() - timedelta(hours=2)
+        Task.objects.filter(pk=old.pk).update(status=TaskStatus.DONE, finished_at=long_ago)
+        Task.objects.filter(pk=recent.pk).update(status=TaskStatus.DONE, finished_at=timezone.now())
+        Task.objects.filter(pk=failed.pk).update(status=TaskStatus.FAILED, finished_at=long_ago)
+        self.assertEqual(taskqueue.purge_finished(), 1)
+        self.assertEqual(set(Task.objects.values_list('pk', flat=True)), {recent.pk, failed.pk})
+
+
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class RunTasksCommandTests(SimpleTestCase):
+    def test_sigterm_stops_workers(self):
+        context = mock.Mock()
+        process = context.Process.return_value
+
+        def deliver_sigterm(sentinels):
+            os.kill(os.getpid(), signal.SIGTERM)
+
+        handler = signal.getsignal(signal.SIGTERM)
+        with mock.patch('multiprocessing.get_context', return_value=context), \
+                mock.patch('database.management.commands.run_tasks.wait', side_effect=deliver_sigterm):
+            call_command('run_tasks', processes=2, stdout=io.StringIO())
+        self.assertEqual(process.terminate.call_count, 2)
+        self.assertEqual(process.join.call_count, 2)
+        self.assertEqual(signal.getsignal(signal.SIGTERM), handler)
+
+
+class PasswordTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch.object(User.objects, 'filter')
+        self.filter = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def stored_password(self):
+        return self.filter.return_value.update.call_args.kwargs['password']
+
+    def test_plain_text_password_upgraded_on_login(self):
+        user = User(user_id=1, email='a@example.com', password='secret')
+        self.assertTrue(credentials.verify_password(user, 'secret'))
+        self.assertTrue(check_password('secret', self.stored_password()))
+        self.assertEqual(user.password, self.stored_password())
+
+    def test_wrong_plain_text_password_not_upgraded(self):
+        user = User(user_id=1, email='a@example.com', password='secret')
+        self.assertFalse(credentials.verify_password(user, 'guess'))
+        self.assertFalse(credentials.verify_password(User(user_id=2, password=''), ''))
+        self.filter.assert_not_called()
+
+    def test_outdated_hash_upgraded_on_login(self):
+        with self.settings(PASSWORD_HASHERS=FAST_HASHERS + ['django.contrib.auth.hashers.ScryptPasswordHasher']):
+            user = User(user_id=1, password=make_password('secret', hasher='scrypt'))
+            self.assertTrue(credentials.verify_password(user, 'secret'))
+        self.assertTrue(self.stored_password().startswith('md5$'))
+
+    def test_current_hash_left_alone(self):
+        user = User(user_id=1, password=make_password('secret'))
+        self.assertTrue(credentials.verify_password(user, 'secret'))
+        self.filter.assert_not_called()
+
+
+@override_settings(PASSWORD_HASHING={'CONCURRENCY': 1, 'TIMEOUT': 5})
+class HashingSlotTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'state', 'ratelimit.json')
+        settings_override = override_settings(
+            RATE_LIMIT_BACKEND={'BACKEND': 'database.ratelimit.FileBackend', 'OPTIONS': {'path': self.path}},
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        ratelimit.get_backend.cache_clear()
+        self.addCleanup(ratelimit.get_backend.cache_clear)
+
+    def test_full_refuses_without_waiting(self):
+        with credentials.hashing_slot():
+            began = time.monotonic()
+            with self.assertRaises(credentials.HashingUnavailable):
+                credentials.hash_password('secret')
+            self.assertLess(time.monotonic() - began, 1)
+
+    def test_slots_shared_by_workers_on_host(self):
+        # Another worker process holds the only slot.
+        token = FileBackend(path=self.path).acquire(credentials.HASHING_SLOT, 1, 5)
+        with self.assertRaises(credentials.HashingUnavailable):
+            credentials.hash_password('secret')
+        FileBackend(path=self.path).release(credentials.HASHING_SLOT, token)
+        self.assertTrue(check_password('secret', credentials.hash_password('secret')))
+
+    def test_slot_freed_after_hash_and_on_error(self):
+        credentials.hash_password('first')
+        with self.assertRaises(TypeError):
+            credentials.hash_password(123)
+        credentials.hash_password('second')
+
+    def test_state_directory_is_private(self):
+        ratelimit.get_backend()
+        self.assertEqual(os.stat(os.path.dirname(self.path)).st_mode & 0o777, 0o700)
+
+
+@override_settings(RATE_LIMIT_BACKEND={'BACKEND': 'database.ratelimit.LocalBackend'})
+class AuthTokenViewTests(SimpleTestCase):
+    def setUp(self):
+        ratelimit.get_backend.cache_clear()
+        self.addCleanup(ratelimit.get_backend.cache_clear)
+
+    def post(self, body):
+        return self.client.post('/api/auth/token/', json.dumps(body), content_type='application/json')
+
+    def test_credentials_must_be_strings(self):
+        with mock.patch('database.views.authenticate') as authenticate:
+            for body in ({'email': 'a@example.com', 'password': 123},
+                         {'email': ['a@example.com'], 'password': 'secret'},
+                         {'email': 'a@example.com', 'password': None}):
+                response = self.post(body)
+                self.assertEqual(response.status_code, 400, body)
+            self.assertEqual(self.post({'email': 'a@example.com'}).status_code, 400)
+        authenticate.assert_not_called()
+
+    def test_busy_hashing_is_503(self):
+        with mock.patch('database.views.authenticate', side_effect=credentials.HashingUnavailable):
+            response = self.post({'email': 'a@example.com', 'password': 'secret'})
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+
+
+@override_settings(
+    CACHES={'tokens': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tokens-test'}},
+    AUTH_TOKEN_CACHE='tokens',
+    AUTH_TOKEN_TTL=300,
+)
+class BearerTokenTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.user = User(user_id=5, email='a@example.com')
+        patcher = mock.patch.object(User.objects, 'filter')
+        patcher.start().return_value.first.return_value = self.user
+        self.addCleanup(patcher.stop)
+
+    def authenticate(self, token):
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return credentials.BearerTokenAuthentication().authenticate(request)
+
+    def test_token_authenticates_until_expiry(self):
+        with mock.patch('time.time', return_value=1000.0):
+            token = credentials.issue_token(self.user)
+        with mock.patch('time.time', return_value=1299.0):
+            self.assertIs(self.authenticate(token)[0], self.user)
+        with mock.patch('time.time', return_value=1301.0):
+            with self.assertRaises(exceptions.AuthenticationFailed):
+                self.authenticate(token)
+
+    def test_unknown_token_rejected(self):
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate('made-up')
+
+    def test_other_schemes_ignored(self):
+        request = self.factory.get('/', HTTP_AUTHORIZATION='Basic abc')
+        self.assertIsNone(credentials.BearerTokenAuthentication().authenticate(request))
+
+
+class UnmanagedTablesMixin:
+    """Create the tables of the models Django does not manage for the test class."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.unmanaged_models = [
+            model for model in apps.get_app_config('database').get_models() if not model._meta.managed
+        ]
+        with connection.schema_editor() as editor:
+            for model in cls.unmanaged_models:
+                editor.create_model(model)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connection.schema_editor() as editor:
+            for model in reversed(cls.unmanaged_models):
+                editor.delete_model(model)
+
+
+ALMATY = (43.238, 76.945)
+KASKELEN = (43.2, 76.62)  # about 27 km west of Almaty
+ASTANA = (51.17, 71.45)
+
+
+class NormalizeLocalityTests(SimpleTestCase):
+    def test_case_space_and_punctuation(self):
+        for name in ('Almaty', '  ALMATY ', 'almaty.'):
+            self.assertEqual(normalize_locality(name), 'almaty')
+        self.assertEqual(normalize_locality('Alma-Ata'), 'alma ata')
+
+    def test_accents(self):
+        self.assertEqual(normalize_locality('Öskemen'), 'oskemen')
+
+    def test_empty(self):
+        self.assertEqual(normalize_locality(None), '')
+        self.assertEqual(normalize_locality(' - '), '')
+
+
+class LocalityTests(TestCase):
+    def locality(self, name, coordinates):
+        return Locality.objects.create(name=name, latitude=coordinates[0], longitude=coordinates[1])
+
+    def test_save_sets_key_and_grid_cell(self):
+        locality = self.locality(' Almaty ', ALMATY)
+        self.assertEqual(locality.key, 'almaty')
+        self.assertEqual((locality.grid_row, locality.grid_col), grid_cell(*ALMATY))
+
+        locality.latitude = None
+        locality.save()
+        self.assertEqual((locality.grid_row, locality.grid_col), (None, None))
+
+    def test_lookup_by_alias(self):
+        almaty = self.locality('Almaty', ALMATY)
+        LocalityAlias.objects.create(key='Alma-Ata', locality=almaty)
+        self.assertEqual(Locality.objects.lookup('ALMA ATA'), almaty)
+        self.assertIsNone(Locality.objects.lookup('Shymkent'))
+
+    def test_within_distance_cut_off(self):
+        almaty = self.locality('Almaty', ALMATY)
+        kaskelen = self.locality('Kaskelen', KASKELEN)
+        self.locality('Astana', ASTANA)
+        self.locality('Nowhere', (None, None))
+        self.assertEqual(set(Locality.objects.within(*ALMATY, 30)), {almaty, kaskelen})
+        self.assertEqual(set(Locality.objects.within(*ALMATY, 20)), {almaty})
+        distance = Locality.objects.within(*ALMATY, 30).get(pk=kaskelen.pk).distance
+        self.assertAlmostEqual(distance, 27, delta=2)
+
+    def test_within_across_antimeridian(self):
+        east = self.locality('East', (0, 179.99))
+        west = self.locality('West', (0, -179.99))
+        self.assertEqual(set(Locality.objects.within(0, 179.99, 10)), {east, west})
+        self.assertEqual(set(Locality.objects.within(0, -179.99, 10)), {east, west})
+
+    def test_within_near_pole(self):
+        a = self.locality('A', (89.99, 0))
+        b = self.locality('B', (89.99, 180))
+        self.assertEqual(set(Locality.objects.within(89.99, 0, 10)), {a, b})
+
+    def test_within_huge_radius(self):
+        self.locality('Almaty', ALMATY)
+        self.locality('Antipode', (-ALMATY[0], ALMATY[1] - 180))
+        self.assertEqual(Locality.objects.within(*ALMATY, 1e300).count(), 2)
+
+
+@override_settings(RATE_LIMIT_BACKEND={'BACKEND': 'database.ratelimit.LocalBackend'})
+class LocalityViewTests(UnmanagedTablesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for name, coordinates in (('Almaty', ALMATY), ('Kaskelen', KASKELEN), ('Astana', ASTANA)):
+            Locality.objects.create(name=name, latitude=coordinates[0], longitude=coordinates[1])
+        cls.member = Member.objects.create(member_user=User.objects.create(email='m@example.com', city='Almaty'))
+        Address.objects.create(member_user=cls.member, town='almaty ')
+        cls.caregivers = {
+            city: Caregiver.objects.create(
+                caregiver_user=User.objects.create(email=f'{city}@example.com', city=city),
+                caregiving_type='babysitter',
+            )
+            for city in ('ALMATY', 'Kaskelen', 'Astana')
+        }
+
+    def setUp(self):
+        ratelimit.get_backend.cache_clear()
+        self.addCleanup(ratelimit.get_backend.cache_clear)
+
+    def caregiver_ids(self, response):
+        self.assertEqual(response.status_code, 200)
+        return {row['caregiver_user'] for row in response.json()}
+
+    def ids(self, *cities):
+        return {self.caregivers[city].pk for city in cities}
+
+    def nearby(self, **params):
+        return self.client.get(f'/api/members/{self.member.pk}/nearby-caregivers/', params)
+
+    def test_city_filter(self):
+        self.assertEqual(self.caregiver_ids(self.client.get('/api/caregivers/', {'city': 'almaty'})), self.ids('ALMATY'))
+        self.assertEqual(self.caregiver_ids(self.client.get('/api/caregivers/')), self.ids('ALMATY', 'Kaskelen', 'Astana'))
+
+    def test_city_filter_unknown_city(self):
+        self.assertEqual(self.caregiver_ids(self.client.get('/api/caregivers/', {'city': 'Atlantis'})), set())
+
+    def test_nearby(self):
+        self.assertEqual(self.caregiver_ids(self.nearby(km=30)), self.ids('ALMATY', 'Kaskelen'))
+        self.assertEqual(self.caregiver_ids(self.nearby()), self.ids('ALMATY'))
+        self.assertEqual(self.caregiver_ids(self.nearby(km=2000, caregiving_type='playmate for children')), set())
+
+    def test_nearby_rejects_bad_radius(self):
+        for km in ('abc', 'nan', 'inf', '-inf', '1e400', '-1'):
+            response = self.nearby(km=km)
+            self.assertEqual(response.status_code, 400, km)
+            self.assertIn('error', response.json())
+
+    def test_nearby_unknown_member(self):
+        response = self.client.get('/api/members/999/nearby-caregivers/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_nearby_without_coordinates(self):
+        Locality.objects.filter(key='almaty').update(latitude=None, longitude=None)
+        self.assertEqual(self.nearby().status_code, 400)
+
+
+class SyncLocalitiesTests(UnmanagedTablesMixin, TestCase):
+    def gazetteer(self, text):
+        f = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+        self.addCleanup(os.unlink, f.name)
+        with f:
+            f.write(text)
+        return f.name
+
+    def sync(self, text):
+        call_command('sync_localities', gazetteer=self.gazetteer(text), stdout=io.StringIO())
+
+    def test_alias_merges_variant_locality(self):
+        user = User.objects.create(email='a@example.com', city='Alma-Ata')
+        variant = user.locality
+        self.assertEqual(variant.key, 'alma ata')
+
+        self.sync('name,latitude,longitude,aliases\nAlmaty,43.238,76.945,Alma-Ata|Almaty City\n')
+
+        almaty = Locality.objects.get(key='almaty')
+        self.assertFalse(Locality.objects.filter(pk=variant.pk).exists())
+        self.assertEqual(set(almaty.aliases.values_list('key', flat=True)), {'alma ata', 'almaty city'})
+        user.refresh_from_db()
+        self.assertEqual(user.locality, almaty)
+        self.assertEqual((almaty.latitude, almaty.grid_row), (43.238, grid_cell(*ALMATY)[0]))
+
+    def test_bad_rows_name_the_row(self):
+        for text in ('Almaty,43.2\n', 'name,latitude,longitude\nAlmaty,north,76\n', 'Almaty,91,76\n'):
+            with self.assertRaisesMessage(CommandError, 'row'):
+                self.sync(text)
+
+
+class LocalityColumnCheckTests(TestCase):
+    def test_tables_created_after_migration_are_reported(self):
+        from .checks import check_locality_columns
+
+        with mock.patch('database.checks.missing_locality_columns', return_value=['user']):
+            errors = check_locality_columns(None, databases=['default'])
+        self.assertEqual([error.id for error in errors], ['database.E001'])
+        self.assertEqual(check_locality_columns(None, databases=['default']), [])
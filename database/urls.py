@@ -1,20 +1,26 @@
 from django.urls import path
 from . import views
+from .ratelimit import rate_limit
+
+# List endpoints scan whole tables, so they also get a cap on concurrent GETs.
+LIST_LIMITS = {'rate': '120/min', 'burst': 30, 'concurrency': 8}
+DETAIL_LIMITS = {'rate': '600/min', 'burst': 60}
 
 urlpatterns = [
-    path('users/', views.user_list_create, name='user-list-create'),
-    path('users/<int:user_id>/', views.user_detail, name='user-detail'),
-    path('caregivers/', views.caregiver_list_create, name='caregiver-list-create'),
-    path('caregivers/<int:caregiver_user_id>/', views.caregiver_detail, name='caregiver-detail'),
-    path('members/', views.member_list_create, name='member-list-create'),
-    path('members/<int:member_user_id>/', views.member_detail, name='member-detail'),
-    path('addresses/', views.address_list_create, name='address-list-create'),
-    path('addresses/<int:member_user_id>/', views.address_detail, name='address-detail'),
-    path('jobs/', views.job_list_create, name='job-list-create'),
-    path('jobs/<int:job_id>/', views.job_detail, name='job-detail'),
-    path('job-applications/', views.job_application_list_create, name='job-application-list-create'),
-    path('job-applications/<int:caregiver_user_id>/<int:job_id>/', views.job_application_detail, name='job-application-detail'),
-    path('appointments/', views.appointment_list_create, name='appointment-list-create'),
-    path('appointments/<int:appointment_id>/', views.appointment_detail, name='appointment-detail'),
+    path('auth/token/', rate_limit(views.auth_token, rate='10/min', burst=5), name='auth-token'),
+    path('users/', rate_limit(views.user_list_create, **LIST_LIMITS), name='user-list-create'),
+    path('users/<int:user_id>/', rate_limit(views.user_detail, **DETAIL_LIMITS), name='user-detail'),
+    path('caregivers/', rate_limit(views.caregiver_list_create, **LIST_LIMITS), name='caregiver-list-create'),
+    path('caregivers/<int:caregiver_user_id>/', rate_limit(views.caregiver_detail, **DETAIL_LIMITS), name='caregiver-detail'),
+    path('members/', rate_limit(views.member_list_create, **LIST_LIMITS), name='member-list-create'),
+    path('members/<int:member_user_id>/', rate_limit(views.member_detail, **DETAIL_LIMITS), name='member-detail'),
+    path('members/<int:member_user_id>/nearby-caregivers/', rate_limit(views.member_nearby_caregivers, **LIST_LIMITS), name='member-nearby-caregivers'),
+    path('addresses/', rate_limit(views.address_list_create, **LIST_LIMITS), name='address-list-create'),
+    path('addresses/<int:member_user_id>/', rate_limit(views.address_detail, **DETAIL_LIMITS), name='address-detail'),
+    path('jobs/', rate_limit(views.job_list_create, **LIST_LIMITS), name='job-list-create'),
+    path('jobs/<int:job_id>/', rate_limit(views.job_detail, **DETAIL_LIMITS), name='job-detail'),
+    path('job-applications/', rate_limit(views.job_application_list_create, **LIST_LIMITS), name='job-application-list-create'),
+    path('job-applications/<int:caregiver_user_id>/<int:job_id>/', rate_limit(views.job_application_detail, **DETAIL_LIMITS), name='job-application-detail'),
+    path('appointments/', rate_limit(views.appointment_list_create, rate='30/min', burst=10, concurrency=2), name='appointment-list-create'),
+    path('appointments/<int:appointment_id>/', rate_limit(views.appointment_detail, **DETAIL_LIMITS), name='appointment-detail'),
 ]
-
@@ -1,13 +1,16 @@
 import json
+import math
+from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from rest_framework.decorators import api_view
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
 from .models import (
-    User, Caregiver, Member, Address, Job, JobApplication, Appointment
+    User, Caregiver, Member, Address, Job, JobApplication, Appointment, Locality
 )
+from .tasks import notify_appointment_requested, notify_job_application
+from .credentials import HashingUnavailable, authenticate, hash_password, issue_token
+from .ratelimit import too_many_requests
 
 
 def model_to_dict(instance):
@@ -33,67 +36,36 @@ def model_to_dict(instance):
             data[field.name] = value
     return data
 
-user_schema = openapi.Schema(
-    type=openapi.TYPE_OBJECT,
-    properties={
-        'user_id': openapi.Schema(type=openapi.TYPE_INTEGER, read_only=True),
-        'email': openapi.Schema(type=openapi.TYPE_STRING, description='User email address'),
-        'given_name': openapi.Schema(type=openapi.TYPE_STRING, description='First name'),
-        'surname': openapi.Schema(type=openapi.TYPE_STRING, description='Last name'),
-        'city': openapi.Schema(type=openapi.TYPE_STRING, description='City'),
-        'phone_number': openapi.Schema(type=openapi.TYPE_STRING, description='Phone number'),
-        'profile_description': openapi.Schema(type=openapi.TYPE_STRING, description='Profile description'),
-        'password': openapi.Schema(type=openapi.TYPE_STRING, description='Password'),
-    },
-    required=['email', 'password']
-)
 
-@swagger_auto_schema(
-    method='get',
-    operation_description="Retrieve a list of all users",
-    responses={200: openapi.Response('List of users', user_schema)}
-)
-@swagger_auto_schema(
-    method='post',
-    operation_description="Create a new user",
-    request_body=user_schema,
-    responses={201: openapi.Response('User created', user_schema), 400: 'Bad request'}
-)
+def user_to_dict(user):
+    data = model_to_dict(user)
+    data.pop('password', None)
+    return data
+
+
 @csrf_exempt
 @api_view(['GET', 'POST'])
 def user_list_create(request):
     if request.method == 'GET':
         users = User.objects.all()
-        data = [model_to_dict(user) for user in users]
+        data = [user_to_dict(user) for user in users]
         return JsonResponse(data, safe=False)
     
     elif request.method == 'POST':
         try:
             data = json.loads(request.body)
+            if 'password' in data:
+                data['password'] = hash_password(data['password'])
             user = User.objects.create(**data)
-            return JsonResponse(model_to_dict(user), status=201)
+            return JsonResponse(user_to_dict(user), status=201)
+        except HashingUnavailable:
+            return too_many_requests('Server is busy, try again later', 503, 1)
         except IntegrityError as e:
             return JsonResponse({'error': str(e)}, status=400)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=400)
 
 
-@swagger_auto_schema(
-    method='get',
-    operation_description="Retrieve a specific user by ID",
-    responses={200: openapi.Response('User details', user_schema), 404: 'User not found'}
-)
-@swagger_auto_schema(
-    method='put',
-    operation_description="Update a specific user",
-    request_body=user_schema,
-    responses={200: openapi.Response('User updated', user_schema), 400: 'Bad request', 404: 'User not found'}
-)
-@swagger_auto_schema(
-    method='delete',
-    operation_description="Delete a specific user",
-    responses={204: 'User deleted', 404: 'User not found'}
-)
 @csrf_exempt
 @api_view(['GET', 'PUT', 'DELETE'])
 def user_detail(request, user_id):
@@ -103,15 +75,19 @@ def user_detail(request, user_id):
         return JsonResponse({'error': 'User not found'}, status=404)
     
     if request.method == 'GET':
-        return JsonResponse(model_to_dict(user))
+        return JsonResponse(user_to_dict(user))
     
     elif request.method == 'PUT':
         try:
             data = json.loads(request.body)
+            if 'password' in data:
+                data['password'] = hash_password(data['password'])
             for key, value in data.items():
                 setattr(user, key, value)
             user.save()
-            return JsonResponse(model_to_dict(user))
+            return JsonResponse(user_to_dict(user))
+        except HashingUnavailable:
+            return too_many_requests('Server is busy, try again later', 503, 1)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=400)
     
@@ -119,25 +95,41 @@ def user_detail(request, user_id):
         user.delete()
         return JsonResponse({'message': 'User deleted successfully'}, status=204)
 
-caregiver_schema = openapi.Schema(
-    type=openapi.TYPE_OBJECT,
-    properties={
-        'caregiver_user_id': openapi.Schema(type=openapi.TYPE_INTEGER, description='User ID (foreign key)'),
-        'photo': openapi.Schema(type=openapi.TYPE_STRING, description='Photo URL or base64'),
-        'gender': openapi.Schema(type=openapi.TYPE_STRING, description='Gender'),
-        'caregiving_type': openapi.Schema(type=openapi.TYPE_STRING, enum=['babysitter', 'caregiver for elderly', 'playmate for children']),
-        'hourly_rate': openapi.Schema(type=openapi.TYPE_NUMBER, description='Hourly rate'),
-    },
-    required=['caregiver_user_id', 'caregiving_type']
-)
 
-@swagger_auto_schema(method='get', operation_description="List all caregivers")
-@swagger_auto_schema(method='post', operation_description="Create a new caregiver", request_body=caregiver_schema)
+@csrf_exempt
+@api_view(['POST'])
+def auth_token(request):
+    try:
+        data = json.loads(request.body)
+        email, password = data['email'], data['password']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'email and password are required'}, status=400)
+    if not isinstance(email, str) or not isinstance(password, str):
+        return JsonResponse({'error': 'email and password must be strings'}, status=400)
+
+    try:
+        user = authenticate(email, password)
+    except HashingUnavailable:
+        return too_many_requests('Server is busy, try again later', 503, 1)
+    if user is None:
+        return JsonResponse({'error': 'Invalid email or password'}, status=401)
+    return JsonResponse({
+        'token': issue_token(user),
+        'token_type': 'Bearer',
+        'expires_in': settings.AUTH_TOKEN_TTL,
+        'user_id': user.user_id,
+    })
+
+
 @csrf_exempt
 @api_view(['GET', 'POST'])
 def caregiver_list_create(request):
     if request.method == 'GET':
         caregivers = Caregiver.objects.all()
+        city = request.GET.get('city')
+        if city:
+            locality = Locality.objects.lookup(city)
+            caregivers = caregivers.filter(caregiver_user__locality=locality) if locality else caregivers.none()
         data = [model_to_dict(caregiver) for caregiver in caregivers]
         return JsonResponse(data, safe=False)
     
@@ -152,9 +144,6 @@ def caregiver_list_create(request):
             return JsonResponse({'error': str(e)}, status=400)
 
 
-@swagger_auto_schema(method='get', operation_description="Get a specific caregiver")
-@swagger_auto_schema(method='put', operation_description="Update a caregiver", request_body=caregiver_schema)
-@swagger_auto_schema(method='delete', operation_description="Delete a caregiver")
 @csrf_exempt
 @api_view(['GET', 'PUT', 'DELETE'])
 def caregiver_detail(request, caregiver_user_id):
@@ -180,18 +169,7 @@ def caregiver_detail(request, caregiver_user_id):
         caregiver.delete()
         return JsonResponse({'message': 'Caregiver deleted successfully'}, status=204)
 
-member_schema = openapi.Schema(
-    type=openapi.TYPE_OBJECT,
-    properties={
-        'member_user_id': openapi.Schema(type=openapi.TYPE_INTEGER, description='User ID (foreign key)'),
-        'house_rules': openapi.Schema(type=openapi.TYPE_STRING, description='House rules'),
-        'dependent_description': openapi.Schema(type=openapi.TYPE_STRING, description='Dependent description'),
-    },
-    required=['member_user_id']
-)
 
-@swagger_auto_schema(method='get', operation_description="List all members")
-@swagger_auto_schema(method='post', operation_description="Create a new member", request_body=member_schema)
 @csrf_exempt
 @api_view(['GET', 'POST'])
 def member_list_create(request):
@@ -211,9 +189,6 @@ def member_list_create(request):
             return JsonResponse({'error': str(e)}, status=400)
 
 
-@swagger_auto_schema(method='get', operation_description="Get a specific member")
-@swagger_auto_schema(method='put', operation_description="Update a member", request_body=member_schema)
-@swagger_auto_schema(method='delete', operation_description="Delete a member")
 @csrf_exempt
 @api_view(['GET', 'PUT', 'DELETE'])
 def member_detail(request, member_user_id):
@@ -239,19 +214,34 @@ def member_detail(request, member_user_id):
         member.delete()
         return JsonResponse({'message': 'Member deleted successfully'}, status=204)
 
-address_schema = openapi.Schema(
-    type=openapi.TYPE_OBJECT,
-    properties={
-        'member_user_id': openapi.Schema(type=openapi.TYPE_INTEGER, description='Member ID (foreign key)'),
-        'house_number': openapi.Schema(type=openapi.TYPE_STRING, description='House number'),
-        'street': openapi.Schema(type=openapi.TYPE_STRING, description='Street name'),
-        'town': openapi.Schema(type=openapi.TYPE_STRING, description='Town/City'),
-    },
-    required=['member_user_id']
-)
 
-@swagger_auto_schema(method='get', operation_description="List all addresses")
-@swagger_auto_schema(method='post', operation_description="Create a new address", request_body=address_schema)
+@csrf_exempt
+@api_view(['GET'])
+def member_nearby_caregivers(request, member_user_id):
+    try:
+        address = Address.objects.select_related('locality').get(member_user_id=member_user_id)
+    except Address.DoesNotExist:
+        return JsonResponse({'error': 'Address not found'}, status=404)
+
+    locality = address.locality
+    if locality is None or locality.latitude is None or locality.longitude is None:
+        return JsonResponse({'error': 'Location of the member address is unknown'}, status=400)
+    try:
+        km = float(request.GET.get('km', 10))
+    except ValueError:
+        km = None
+    if km is None or not math.isfinite(km) or km < 0:
+        return JsonResponse({'error': 'km must be a non-negative number'}, status=400)
+
+    nearby = Locality.objects.within(locality.latitude, locality.longitude, km)
+    caregivers = Caregiver.objects.filter(caregiver_user__locality__in=nearby.values('pk'))
+    caregiving_type = request.GET.get('caregiving_type')
+    if caregiving_type:
+        caregivers = caregivers.filter(caregiving_type=caregiving_type)
+    data = [model_to_dict(caregiver) for caregiver in caregivers]
+    return JsonResponse(data, safe=False)
+
+
 @csrf_exempt
 @api_view(['GET', 'POST'])
 def address_list_create(request):
@@ -271,9 +261,6 @@ def address_list_create(request):
             return JsonResponse({'error': str(e)}, status=400)
 
 
-@swagger_auto_schema(method='get', operation_description="Get a specific address")
-@swagger_auto_schema(method='put', operation_description="Update an address", request_body=address_schema)
-@swagger_auto_schema(method='delete', operation_description="Delete an address")
 @csrf_exempt
 @api_view(['GET', 'PUT', 'DELETE'])
 def address_detail(request, member_user_id):
@@ -299,20 +286,7 @@ def address_detail(request, member_user_id):
         address.delete()
         return JsonResponse({'message': 'Address deleted successfully'}, status=204)
 
-job_schema = openapi.Schema(
-    type=openapi.TYPE_OBJECT,
-    properties={
-        'job_id': openapi.Schema(type=openapi.TYPE_INTEGER, read_only=True),
-        'member_user_id': openapi.Schema(type=openapi.TYPE_INTEGER, description='Member ID (foreign key)'),
-        'required_caregiving_type': openapi.Schema(type=openapi.TYPE_STRING, enum=['babysitter', 'caregiver for elderly', 'playmate for children']),
-        'other_requirements': openapi.Schema(type=openapi.TYPE_STRING, description='Other requirements'),
-        'date_posted': openapi.Schema(type=openapi.FORMAT_DATE, description='Date posted'),
-    },
-    required=['member_user_id', 'required_caregiving_type']
-)
 
-@swagger_auto_schema(method='get', operation_description="List all jobs")
-@swagger_auto_schema(method='post', operation_description="Create a new job", request_body=job_schema)
 @csrf_exempt
 @api_view(['GET', 'POST'])
 def job_list_create(request):
@@ -332,9 +306,6 @@ def job_list_create(request):
             return JsonResponse({'error': str(e)}, status=400)
 
 
-@swagger_auto_schema(method='get', operation_description="Get a specific job")
-@swagger_auto_schema(method='put', operation_description="Update a job", request_body=job_schema)
-@swagger_auto_schema(method='delete', operation_description="Delete a job")
 @csrf_exempt
 @api_view(['GET', 'PUT', 'DELETE'])
 def job_detail(request, job_id):
@@ -360,18 +331,7 @@ def job_detail(request, job_id):
         job.delete()
         return JsonResponse({'message': 'Job deleted successfully'}, status=204)
 
-job_application_schema = openapi.Schema(
-    type=openapi.TYPE_OBJECT,
-    properties={
-        'caregiver_user_id': openapi.Schema(type=openapi.TYPE_INTEGER, description='Caregiver ID (foreign key)'),
-        'job_id': openapi.Schema(type=openapi.TYPE_INTEGER, description='Job ID (foreign key)'),
-        'date_applied': openapi.Schema(type=openapi.FORMAT_DATE, description='Date applied'),
-    },
-    required=['caregiver_user_id', 'job_id']
-)
 
-@swagger_auto_schema(method='get', operation_description="List all job applications")
-@swagger_auto_schema(method='post', operation_description="Create a new job application", request_body=job_application_schema)
 @csrf_exempt
 @api_view(['GET', 'POST'])
 def job_application_list_create(request):
@@ -383,7 +343,9 @@ def job_application_list_create(request):
     elif request.method == 'POST':
         try:
             data = json.loads(request.body)
-            application = JobApplication.objects.create(**data)
+            with transaction.atomic():
+                application = JobApplication.objects.create(**data)
+                notify_job_application.enqueue(application_id=application.pk)
             return JsonResponse(model_to_dict(application), status=201)
         except IntegrityError as e:
             return JsonResponse({'error': str(e)}, status=400)
@@ -391,9 +353,6 @@ def job_application_list_create(request):
             return JsonResponse({'error': str(e)}, status=400)
 
 
-@swagger_auto_schema(method='get', operation_description="Get a specific job application")
-@swagger_auto_schema(method='put', operation_description="Update a job application", request_body=job_application_schema)
-@swagger_auto_schema(method='delete', operation_description="Delete a job application")
 @csrf_exempt
 @api_view(['GET', 'PUT', 'DELETE'])
 def job_application_detail(request, caregiver_user_id, job_id):
@@ -422,22 +381,7 @@ def job_application_detail(request, caregiver_user_id, job_id):
         application.delete()
         return JsonResponse({'message': 'Job application deleted successfully'}, status=204)
 
-appointment_schema = openapi.Schema(
-    type=openapi.TYPE_OBJECT,
-    properties={
-        'appointment_id': openapi.Schema(type=openapi.TYPE_INTEGER, read_only=True),
-        'caregiver_user_id': openapi.Schema(type=openapi.TYPE_INTEGER, description='Caregiver ID (foreign key)'),
-        'member_user_id': openapi.Schema(type=openapi.TYPE_INTEGER, description='Member ID (foreign key)'),
-        'appointment_date': openapi.Schema(type=openapi.FORMAT_DATE, description='Appointment date'),
-        'appointment_time': openapi.Schema(type=openapi.TYPE_STRING, description='Appointment time (HH:MM:SS)'),
-        'work_hours': openapi.Schema(type=openapi.TYPE_NUMBER, description='Work hours'),
-        'status': openapi.Schema(type=openapi.TYPE_STRING, enum=['Pending', 'Confirmed', 'Declined'], description='Appointment status'),
-    },
-    required=['caregiver_user_id', 'member_user_id', 'appointment_date', 'appointment_time', 'work_hours']
-)
 
-@swagger_auto_schema(method='get', operation_description="List all appointments")
-@swagger_auto_schema(method='post', operation_description="Create a new appointment", request_body=appointment_schema)
 @csrf_exempt
 @api_view(['GET', 'POST'])
 def appointment_list_create(request):
@@ -449,7 +393,9 @@ def appointment_list_create(request):
     elif request.method == 'POST':
         try:
             data = json.loads(request.body)
-            appointment = Appointment.objects.create(**data)
+            with transaction.atomic():
+                appointment = Appointment.objects.create(**data)
+                notify_appointment_requested.enqueue(appointment_id=appointment.appointment_id)
             return JsonResponse(model_to_dict(appointment), status=201)
         except IntegrityError as e:
             return JsonResponse({'error': str(e)}, status=400)
@@ -457,9 +403,6 @@ def appointment_list_create(request):
             return JsonResponse({'error': str(e)}, status=400)
 
 
-@swagger_auto_schema(method='get', operation_description="Get a specific appointment")
-@swagger_auto_schema(method='put', operation_description="Update an appointment", request_body=appointment_schema)
-@swagger_auto_schema(method='delete', operation_description="Delete an appointment")
 @csrf_exempt
 @api_view(['GET', 'PUT', 'DELETE'])
 def appointment_detail(request, appointment_id):